@@ -0,0 +1,233 @@
+import argparse
+import importlib.machinery
+import importlib.util
+import os
+import random
+import statistics
+import tempfile
+import time
+
+# Headless benchmark of RalphGUI.py's data layer: list fetches, cache hits and revalidation, the local
+# mirror, user lookups, type-ahead indexing, export and bulk writes. It imports the GUI's own client
+# code (no window is opened) and drives it against "Ralph mock server.py", started in-process unless
+# --base-url points at another server.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# The mock server has spaces in its name, so load scripts by path
+def load_script(name, filename):
+    loader = importlib.machinery.SourceFileLoader(name, os.path.join(HERE, filename))
+    spec = importlib.util.spec_from_loader(name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def request_count(api):
+    return sum(row['count'] for row in api.metrics.summary())
+
+
+# Run work() and return a result row with its wall time and the number of requests it made
+def measure(api, scenario, detail, work, unit):
+    before = request_count(api)
+    started = time.perf_counter()
+    amount = work()
+    seconds = time.perf_counter() - started
+    return {
+        "scenario": scenario,
+        "detail": detail,
+        "requests": request_count(api) - before,
+        "seconds": seconds,
+        "throughput": f"{amount / max(seconds, 1e-9):,.0f} {unit}/s" if amount is not None else "",
+    }
+
+
+def make_client(ralph, base_url, mirror):
+    api = ralph.RalphClient({"url": base_url, "api_token": "benchmark"})
+    if not mirror:
+        if api.mirror:
+            api.mirror.close()
+        api.mirror, api.outbox = None, None
+    return api
+
+
+# Every record of each list endpoint, live, at each page concurrency
+def bench_fetch(ralph, base_url, concurrencies, page_size):
+    rows = []
+    for concurrency in concurrencies:
+        api = make_client(ralph, base_url, mirror=False)
+        for kind, path in (("users", "/api/users/"), ("assets", "/api/back-office-assets/")):
+            rows.append(measure(api, f"fetch {kind}", f"conc {concurrency}", lambda: sum(
+                len(page) for page in api.fetch_pages(path, page_size=page_size, max_workers=concurrency)
+            ), "records"))
+        api.close()
+    return rows
+
+
+# A cold load, a hit while the TTL holds, and a conditional reload (all 304s) once it has expired;
+# then the regions/warehouses/manufacturers maps and the server-filtered available laptops
+def bench_cache(ralph, base_url):
+    api = make_client(ralph, base_url, mirror=False)
+    rows = [measure(api, "cached_list assets", "cold", lambda: len(api.cached_list("assets", "/api/back-office-assets/")), "records")]
+    rows.append(measure(api, "cached_list assets", "ttl hit", lambda: len(api.cached_list("assets", "/api/back-office-assets/")), "records"))
+    api.invalidate("assets")
+    rows.append(measure(api, "cached_list assets", "revalidate", lambda: len(api.cached_list("assets", "/api/back-office-assets/")), "records"))
+    for detail in ("cold, in parallel", "ttl hit"):
+        rows.append(measure(api, "reference data", detail, lambda: sum(len(names) for names in api.reference_maps().values()), "names"))
+    filters = {"status__in": ",".join(ralph.AVAILABLE_STATUSES), "fields": ralph.AVAILABLE_ASSET_FIELDS}
+    rows.append(measure(api, "available laptops", "server filter", lambda: len(api.cached_list(
+        "available", "/api/back-office-assets/", optional_params=filters)), "records"))
+    api.close()
+    return rows
+
+
+# First sync into an empty mirror, an incremental sync after a few changes, and local queries
+def bench_mirror(ralph, base_url, changes):
+    api = make_client(ralph, base_url, mirror=True)
+    path = "/api/back-office-assets/"
+    rows = [measure(api, "mirror sync assets", "full", lambda: len(api.cached_list("assets", path)), "records")]
+    assets = api.mirror.records("assets", "WHERE id > 0")
+    for asset in random.sample(assets, min(changes, len(assets))):
+        api.patch(f"{path}{asset['id']}/", json={"price": "999.00"})
+    api.invalidate("assets")
+    rows.append(measure(api, "mirror sync assets", f"{changes} changed", lambda: len(api.cached_list("assets", path)), "records"))
+
+    usernames = [row["username"] for row in api.mirror.query("SELECT DISTINCT username FROM assets WHERE username IS NOT NULL LIMIT 100")]
+    rows.append(measure(api, "mirror user assets", f"{len(usernames)} users",
+                        lambda: [api.mirror.user_assets(name) for name in usernames] and len(usernames), "lookups"))
+    rows.append(measure(api, "mirror report", "per warehouse", lambda: len(api.mirror.available_per_warehouse()) and 1, "reports"))
+    api.close()
+    return rows
+
+
+# Server-side user asset lookups, one user at a time as the search box does them
+def bench_lookup(ralph, base_url, lookups):
+    api = make_client(ralph, base_url, mirror=False)
+    users = api.cached_list("users", "/api/users/")
+    api.metrics.reset()
+    names = [user["username"] for user in random.sample(users, min(lookups, len(users)))]
+    latencies = []
+
+    def run():
+        for name in names:
+            started = time.perf_counter()
+            ralph.find_user_assets(api, name)
+            latencies.append(time.perf_counter() - started)
+        return len(names)
+
+    row = measure(api, "find_user_assets", "", run, "lookups")
+    row["detail"] = f"p50 {statistics.median(latencies) * 1000:.1f}ms p95 {percentile(latencies, 95) * 1000:.1f}ms" if latencies else ""
+
+    index = {}
+    rows = [row, measure(api, "type-ahead index", f"{len(users)} users", lambda: len(index.setdefault("users", ralph.PrefixIndex({
+        user["username"]: [user.get("username"), user.get("first_name"), user.get("last_name"), user.get("email")]
+        for user in users
+    }))), "labels")]
+    queries = [name[1:4] for name in names] or ["a"]
+    rows.append(measure(api, "type-ahead search", f"{len(queries)} queries",
+                        lambda: [index["users"].search(query) for query in queries] and len(queries), "queries"))
+    api.close()
+    return rows
+
+
+def bench_export(ralph, base_url):
+    api = make_client(ralph, base_url, mirror=False)
+    with tempfile.TemporaryDirectory() as work_dir:
+        rows = [measure(api, "export assets", fmt, lambda: ralph.export_assets(api, os.path.join(work_dir, f"assets.{fmt}")), "rows")
+                for fmt in ("csv", "jsonl")]
+    api.close()
+    return rows
+
+
+# Validate and POST new laptops through the bulk intake code at each concurrency
+def bench_bulk(ralph, base_url, count, concurrencies):
+    api = make_client(ralph, base_url, mirror=False)
+    models = api.cached_list("models", "/api/assetmodels/")
+    reference = api.reference_maps()
+    regions, warehouses = list(reference["regions"]), list(reference["warehouses"])
+    run_id = int(time.time())
+    rows = []
+    for concurrency in concurrencies:
+        fieldnames = list(ralph.LAPTOP_CSV_COLUMNS)
+        csv_rows = [{
+            "sn": f"BENCH{run_id}-{concurrency}-{i}", "barcode": f"BB{run_id}-{concurrency}-{i}",
+            "model": random.choice(models)["name"], "region": random.choice(regions),
+            "warehouse": random.choice(warehouses), "price": "1500",
+        } for i in range(count)]
+        items = []
+
+        def run():
+            items.extend(ralph.validate_laptop_rows(fieldnames, csv_rows, models, reference))
+            ralph.send_bulk(api, items, lambda api, item: api.post("/api/back-office-assets/", json=item["data"]), 201,
+                            max_workers=concurrency)
+            return sum(item["result"] == "ok" for item in items)
+
+        row = measure(api, "bulk add laptops", f"conc {concurrency}", run, "rows")
+        failed = sum(item["result"] != "ok" for item in items)
+        if failed:
+            row["detail"] += f", {failed} failed"
+        rows.append(row)
+    api.close()
+    return rows
+
+
+def print_rows(rows):
+    header = f"{'scenario':<20} {'detail':<28} {'reqs':>6} {'seconds':>9}  throughput"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['scenario']:<20} {row['detail']:<28} {row['requests']:>6} {row['seconds']:>9.3f}  {row['throughput']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RalphGUI's data layer against a local mock Ralph server.")
+    parser.add_argument("--base-url", help="use an already running server instead of starting the mock")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8], help="page fetch and bulk write concurrency")
+    parser.add_argument("--page-size", type=int, default=200, help="records per page for the fetch scenario")
+    parser.add_argument("--lookups", type=int, default=50, help="user asset lookups to time")
+    parser.add_argument("--changes", type=int, default=20, help="assets changed before the incremental mirror sync")
+    parser.add_argument("--bulk-rows", type=int, default=100, help="laptops added per bulk run")
+    parser.add_argument("--users", type=int, default=2000, help="mock: number of seeded users")
+    parser.add_argument("--assets", type=int, default=20000, help="mock: number of seeded assets")
+    parser.add_argument("--latency", type=float, default=0.02, help="mock: seconds added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="mock: fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        mock = load_script("ralph_mock_server", "Ralph mock server.py")
+        server = mock.start_mock_server(mock.MockSettings(users=args.users, assets=args.assets,
+                                                          latency=args.latency, error_rate=args.error_rate))
+        base_url = server.base_url
+
+    ralph = load_script("ralph_gui", "RalphGUI.py")
+    random.seed(1)
+    rows = []
+    with tempfile.TemporaryDirectory() as mirror_dir:
+        # Keep the benchmark's mirror databases away from the real ones
+        ralph.MIRROR_DIR = mirror_dir
+        rows += bench_fetch(ralph, base_url, args.concurrency, args.page_size)
+        rows += bench_cache(ralph, base_url)
+        rows += bench_mirror(ralph, base_url, args.changes)
+        rows += bench_lookup(ralph, base_url, args.lookups)
+        rows += bench_export(ralph, base_url)
+        rows += bench_bulk(ralph, base_url, args.bulk_rows, args.concurrency)
+    print_rows(rows)
+
+    if server:
+        print(f"\nMock requests served: {server.counts}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
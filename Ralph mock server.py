@@ -0,0 +1,356 @@
+import argparse
+import hashlib
+import json
+import logging
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Local stand-in for the parts of the Ralph API that RalphGUI.py uses, with a seeded synthetic
+# inventory, for trying the GUI at scale or over a slow link without touching a real server.
+# Add it in Settings > Server Manager with URL http://127.0.0.1:8090 and any API token.
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8090
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Served from /api/regions/, /api/warehouses/ and /api/manufacturers/ (the ids RalphGUI.py used to hardcode)
+REGIONS = {"Brisbane": 1, "Mackay": 2, "Melbourne": 3, "Townsville": 4, "Sydney": 5, "Melbourne Airport": 6}
+WAREHOUSES = {"Brisbane": 2, "Caboolture": 3, "Mackay": 4, "Melbourne": 5, "Townsville": 6, "Sydney": 7, "Melbourne Airport": 8}
+MANUFACTURERS = {"HP": 1, "Lenovo": 3, "Metabox": 4, "Microsoft": 5}
+
+STATUSES = ("new", "in use", "free", "return in progress", "damaged", "liquidated")
+STATUS_WEIGHTS = (5, 60, 20, 5, 5, 5)
+FIRST_NAMES = ("Alex", "Sam", "Jordan", "Taylor", "Chris", "Jamie", "Morgan", "Casey", "Riley", "Drew", "Pat", "Robin")
+LAST_NAMES = ("Smith", "Jones", "Nguyen", "Brown", "Wilson", "Taylor", "Johnson", "White", "Martin", "Lee", "Walker", "Hall")
+MODEL_NAMES = {"HP": "EliteBook", "Lenovo": "ThinkPad", "Metabox": "Prime", "Microsoft": "Surface Laptop"}
+
+
+class MockSettings:
+    def __init__(self, users=500, models=20, assets=5000, seed=1, latency=0.0, error_rate=0.0,
+                 rate_limit_rate=0.0, retry_after=1.0):
+        self.users = users                       # Size of the seeded dataset
+        self.models = models
+        self.assets = assets
+        self.seed = seed
+        self.latency = latency                   # Seconds added to every request
+        self.error_rate = error_rate             # Probability of answering 503
+        self.rate_limit_rate = rate_limit_rate   # Probability of answering 429
+        self.retry_after = retry_after           # Retry-After sent with injected 429s, in seconds
+
+
+def timestamp(moment=None):
+    return (moment or datetime.now()).strftime("%Y-%m-%dT%H:%M:%S.%f")
+
+
+# The synthetic inventory. Related objects are nested the way Ralph returns them.
+class RalphData:
+    def __init__(self, settings):
+        rng = random.Random(settings.seed)
+        base = datetime(2024, 1, 1)
+        self.lock = threading.Lock()
+        self.regions = {id_: {"id": id_, "name": name} for name, id_ in REGIONS.items()}
+        self.warehouses = {id_: {"id": id_, "name": name} for name, id_ in WAREHOUSES.items()}
+        self.manufacturers = {id_: {"id": id_, "name": name} for name, id_ in MANUFACTURERS.items()}
+
+        self.users = {}
+        for id_ in range(1, settings.users + 1):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            username = f"{first[0].lower()}{last.lower()}{id_}"
+            self.users[id_] = {
+                "id": id_, "username": username, "first_name": first, "last_name": last,
+                "email": f"{username}@example.com", "modified": timestamp(base + timedelta(minutes=id_)),
+            }
+
+        self.models = {}
+        for id_ in range(1, settings.models + 1):
+            manufacturer = rng.choice(list(self.manufacturers.values()))
+            self.models[id_] = {
+                "id": id_, "name": f"{MODEL_NAMES[manufacturer['name']]} {id_ * 10}", "manufacturer": manufacturer,
+                "type": "back_office", "modified": timestamp(base + timedelta(minutes=id_)),
+            }
+
+        self.assets = {}
+        for id_ in range(1, settings.assets + 1):
+            status = rng.choices(STATUSES, STATUS_WEIGHTS)[0]
+            user = rng.choice(list(self.users.values())) if status == "in use" and self.users else None
+            self.assets[id_] = {
+                "id": id_, "sn": f"SN{id_:07d}", "barcode": f"BC{id_:07d}", "status": status,
+                "type": "back office", "category": "laptop",
+                "user": self.user_ref(user["id"]) if user else None,
+                "model": rng.choice(list(self.models.values())) if self.models else None,
+                "region": rng.choice(list(self.regions.values())),
+                "warehouse": rng.choice(list(self.warehouses.values())),
+                "price": f"{rng.randint(900, 3500)}.00", "price_currency": "AUD",
+                "modified": timestamp(base + timedelta(seconds=id_)),
+            }
+
+    def user_ref(self, user_id):
+        user = self.users.get(user_id)
+        if not user:
+            return None
+        return {key: user[key] for key in ("id", "username", "first_name", "last_name")}
+
+    def collection(self, name):
+        return {
+            "users": self.users, "assetmodels": self.models, "back-office-assets": self.assets,
+            "regions": self.regions, "warehouses": self.warehouses, "manufacturers": self.manufacturers,
+        }.get(name)
+
+
+# Match one record against the query parameters we understand: exact values, __in lists, __gte, and
+# nested lookups like user__username. Unknown parameters are ignored, as django-filter does.
+def matches(record, name, value):
+    field, _, lookup = name.partition("__")
+    current = record.get(field)
+    if lookup and lookup not in ("in", "gte"):
+        current, lookup = current.get(lookup) if isinstance(current, dict) else None, ""
+    elif isinstance(current, dict):
+        current = current.get("id")
+    if current is None:
+        return value in ("", "null")
+    if lookup == "in":
+        return str(current) in value.split(",")
+    if lookup == "gte":
+        return str(current) >= value
+    return str(current) == value
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so the client's keep-alive pool is exercised
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, delayed ACKs add ~40 ms per request
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    @property
+    def settings(self):
+        return self.server.settings
+
+    @property
+    def data(self):
+        return self.server.data
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+    def do_PATCH(self):
+        self.handle_request("PATCH")
+
+    def handle_request(self, method):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.settings.latency:
+            time.sleep(self.settings.latency)
+        if not self.headers.get("Authorization", "").startswith("Token "):
+            self.send_json(401, {"detail": "Authentication credentials were not provided."})
+            return
+        if self.inject_error():
+            return
+
+        url = urlparse(self.path)
+        match = re.fullmatch(r"/api/([a-z-]+)/(?:(-?\d+)/)?", url.path)
+        collection = self.data.collection(match.group(1)) if match else None
+        if collection is None:
+            self.send_json(404, {"detail": "Not found."})
+            return
+        record_id = int(match.group(2)) if match.group(2) else None
+        self.server.count(f"{method} {match.group(1)}{'/{id}' if record_id is not None else ''}")
+
+        if method == "GET" and record_id is None:
+            self.list_records(collection, {k: v[-1] for k, v in parse_qs(url.query).items()})
+        elif method == "GET":
+            record = collection.get(record_id)
+            self.send_json(200, record) if record else self.send_json(404, {"detail": "Not found."})
+        else:
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                self.send_json(400, {"detail": "JSON parse error"})
+                return
+            if method == "POST" and record_id is None:
+                self.create(match.group(1), collection, payload)
+            elif method == "PATCH" and record_id is not None:
+                self.update(match.group(1), collection, record_id, payload)
+            else:
+                self.send_json(405, {"detail": f'Method "{method}" not allowed.'})
+
+    def inject_error(self):
+        roll = random.random()
+        if roll < self.settings.rate_limit_rate:
+            self.send_json(429, {"detail": "Request was throttled (mock)."}, {"Retry-After": f"{self.settings.retry_after:g}"})
+            self.server.count("429")
+            return True
+        if roll < self.settings.rate_limit_rate + self.settings.error_rate:
+            self.send_json(503, {"detail": "Service unavailable (mock)."})
+            self.server.count("503")
+            return True
+        return False
+
+    # Limit/offset pagination like Ralph's DRF API, with filtering, ?fields= projection and ETags
+    def list_records(self, collection, query):
+        limit = min(MAX_PAGE_SIZE, int(query.pop("limit", DEFAULT_PAGE_SIZE)))
+        offset = int(query.pop("offset", 0))
+        fields = query.pop("fields", None)
+        query.pop("ordering", None)
+        with self.data.lock:
+            records = [record for record in collection.values()
+                       if all(matches(record, name, value) for name, value in query.items())]
+        page = records[offset:offset + limit]
+        if fields:
+            wanted = fields.split(",")
+            page = [{field: record.get(field) for field in wanted} for record in page]
+
+        base = f"http://{self.headers.get('Host')}{urlparse(self.path).path}"
+        payload = {
+            "count": len(records),
+            "next": f"{base}?limit={limit}&offset={offset + limit}" if offset + limit < len(records) else None,
+            "previous": f"{base}?limit={limit}&offset={max(0, offset - limit)}" if offset else None,
+            "results": page,
+        }
+        data = json.dumps(payload).encode("utf-8")
+        etag = '"' + hashlib.md5(data).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            self.server.count("304")
+            return
+        self.send_body(200, data, {"ETag": etag})
+
+    # Turn ids in a request body into the nested objects Ralph returns
+    def resolve(self, payload):
+        record = dict(payload)
+        with_refs = {"user": self.data.user_ref, "model": self.data.models.get, "region": self.data.regions.get,
+                     "warehouse": self.data.warehouses.get, "manufacturer": self.data.manufacturers.get}
+        for field, lookup in with_refs.items():
+            if field in record and record[field] is not None:
+                value = lookup(int(record[field]))
+                if value is None:
+                    return None, {field: [f'Invalid pk "{record[field]}" - object does not exist.']}
+                record[field] = value
+        return record, None
+
+    def create(self, name, collection, payload):
+        record, errors = self.resolve(payload)
+        with self.data.lock:
+            if not errors and name == "back-office-assets":
+                if any(asset["sn"] == record.get("sn") for asset in collection.values()):
+                    errors = {"sn": ["Asset with this SN already exists."]}
+                elif record.get("barcode") and any(asset["barcode"] == record["barcode"] for asset in collection.values()):
+                    errors = {"barcode": ["Asset with this barcode already exists."]}
+            if not errors and name == "users" and any(user["username"] == record.get("username") for user in collection.values()):
+                errors = {"username": ["A user with that username already exists."]}
+            if errors:
+                self.send_json(400, errors)
+                return
+            record["id"] = max(collection, default=0) + 1
+            record["modified"] = timestamp()
+            collection[record["id"]] = record
+        self.send_json(201, record)
+
+    def update(self, name, collection, record_id, payload):
+        record, errors = self.resolve(payload)
+        if errors:
+            self.send_json(400, errors)
+            return
+        with self.data.lock:
+            current = collection.get(record_id)
+            if not current:
+                self.send_json(404, {"detail": "Not found."})
+                return
+            current.update(record, modified=timestamp())
+            result = dict(current)
+        self.send_json(200, result)
+
+    def send_json(self, status, payload, headers=None):
+        self.send_body(status, json.dumps(payload).encode("utf-8"), headers)
+
+    def send_body(self, status, data, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, settings):
+        super().__init__(address, MockHandler)
+        self.settings = settings
+        self.data = RalphData(settings)
+        self.counts = {}
+        self.counts_lock = threading.Lock()
+
+    # Clients hanging up mid-response (e.g. a benchmark finishing) are expected, not errors
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+    def count(self, name):
+        with self.counts_lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+# Start a mock server on a background thread; port 0 picks a free port
+def start_mock_server(settings=None, host="127.0.0.1", port=0):
+    server = MockServer((host, port), settings or MockSettings())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Ralph API endpoints RalphGUI uses.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--users", type=int, default=500, help="number of seeded users")
+    parser.add_argument("--models", type=int, default=20, help="number of seeded asset models")
+    parser.add_argument("--assets", type=int, default=5000, help="number of seeded back-office assets")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the dataset")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    args = parser.parse_args()
+
+    settings = MockSettings(users=args.users, models=args.models, assets=args.assets, seed=args.seed,
+                            latency=args.latency, error_rate=args.error_rate,
+                            rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after)
+    server = MockServer((args.host, args.port), settings)
+    logger.info(f"Mock Ralph server listening on {server.base_url} with {args.users} users, "
+                f"{args.models} models and {args.assets} assets")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info(f"Requests served: {server.counts}")
+
+
+if __name__ == "__main__":
+    main()
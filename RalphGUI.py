@@ -1,46 +1,1248 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
+import csv
+import hashlib
+import itertools
 import json
+import logging
+import queue
+import re
+import sqlite3
+import time
+import threading
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
+
+# Set up logging
+logging.basicConfig(level=logging.ERROR)
+logger = logging.getLogger(__name__)
 
 CONFIG_FILE = 'servers.json'
 
-# Predefined regions and warehouses
-REGIONS = {
-    "Melbourne Airport": 6,
-    "Sydney": 5,
-    "Townsville": 4,
-    "Melbourne": 3,
-    "Mackay": 2,
-    "Brisbane": 1
+# HTTP settings for talking to Ralph: (connect, read) timeouts in seconds, keep-alive pool size,
+# and automatic retries, which are limited to idempotent methods so a POST is never sent twice
+REQUEST_TIMEOUT = (5, 30)
+POOL_SIZE = 10
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+
+# List endpoints are read PAGE_SIZE records at a time, with up to PAGE_WORKERS pages in flight
+PAGE_SIZE = 200
+PAGE_WORKERS = 4
+
+# Reference data is reused for this many seconds before it is fetched again; a server entry in
+# servers.json can override any of these with e.g. "cache_ttl": {"users": 900}
+CACHE_TTLS = {
+    'users': 300,
+    'models': 600,
+    'assets': 60,
+    'regions': 3600,
+    'warehouses': 3600,
+    'manufacturers': 3600
 }
 
-WAREHOUSES = {
-    "Townsville": 6,
-    "Sydney": 7,
-    "Melbourne Airport": 8,
-    "Melbourne": 5,
-    "Mackay": 4,
-    "Caboolture": 3,
-    "Brisbane": 2
+# Cached list pages keep their ETag/Last-Modified and payload for conditional reloads; at most this many
+# pages per server, least recently used dropped first
+VALIDATOR_LIMIT = 500
+
+# Laptops in these statuses can be assigned. The filter and field list are sent to the server
+# (django-filter "__in" lookup and field projection); servers that ignore them still work because
+# the status check is repeated locally, and servers that reject them are asked again without.
+AVAILABLE_STATUSES = ('free', 'new', 'return in progress')
+AVAILABLE_ASSET_FIELDS = 'id,sn,status'
+
+# Local SQLite mirror of each server's inventory (users, asset models, back-office assets). Syncs
+# are incremental by modification time, with a full reload at least this often to catch deletions.
+MIRROR_DIR = os.path.join(os.environ.get('LOCALAPPDATA', os.path.expanduser('~')), 'RalphManager')
+FULL_SYNC_INTERVAL = 24 * 60 * 60
+
+# Queued writes that fail on the network, 429 or 5xx are retried after OUTBOX_BACKOFF_BASE seconds,
+# doubling per attempt up to OUTBOX_BACKOFF_MAX
+OUTBOX_BACKOFF_BASE = 2
+OUTBOX_BACKOFF_MAX = 300
+
+# Request metrics: latency samples kept per endpoint for percentiles, and requests slower than
+# SLOW_REQUEST_SECONDS kept in a rolling log of SLOW_LOG_SIZE entries (Help > Diagnostics)
+LATENCY_SAMPLES = 2000
+SLOW_REQUEST_SECONDS = 2.0
+SLOW_LOG_SIZE = 200
+
+# Searches across every server in servers.json give each server this many seconds to answer
+FANOUT_TIMEOUT = 15
+
+# Type-ahead in the user and serial number combos: at most MATCH_LIMIT suggestions, and index
+# suffixes are cut to SUFFIX_LENGTH characters (longer queries are confirmed against the full text)
+MATCH_LIMIT = 200
+SUFFIX_LENGTH = 24
+
+# Bulk CSV intake and assignment: required columns, writes in flight at once, and the currency
+# used when a laptop row has no price_currency column
+LAPTOP_CSV_COLUMNS = ('sn', 'barcode', 'model', 'region', 'warehouse', 'price')
+ASSIGN_CSV_COLUMNS = ('sn', 'username')
+BULK_WORKERS = 4
+DEFAULT_CURRENCY = 'AUD'
+
+# Ralph I/O runs on this many worker threads; results are handed back to Tk every UI_POLL_MS
+IO_WORKERS = 4
+UI_POLL_MS = 100
+
+# Reference lists the forms pick from by name; each is loaded as a name -> id map per server
+REFERENCE_LISTS = {
+    'regions': '/api/regions/',
+    'warehouses': '/api/warehouses/',
+    'manufacturers': '/api/manufacturers/'
 }
 
-MANUFACTURERS = {
-    "Microsoft": 5,
-    "HP": 1,
-    "Metabox": 4,
-    "Lenovo": 3
+# Raised for any Ralph response other than the expected status; str() gives the server's reply
+class RalphAPIError(Exception):
+    def __init__(self, response):
+        super().__init__(response.text)
+        self.response = response
+        self.status_code = response.status_code
+
+# The id of a related object, whether the API returned it nested ({'id': .., 'name': ..}) or as a bare id
+def ref_id(value):
+    return value.get('id') if isinstance(value, dict) else value
+
+def ref_name(value, field='name'):
+    return value.get(field) if isinstance(value, dict) else None
+
+# Where the mirror database for a server lives; one file per server URL
+def mirror_path(url):
+    return os.path.join(MIRROR_DIR, hashlib.sha1(url.rstrip('/').encode('utf-8')).hexdigest()[:16] + '.db')
+
+# Local SQLite copy of a server's users, asset models and back-office assets. The first sync of a
+# kind loads everything; after that only records modified since the newest one we hold are fetched
+# (modified__gte). A full reload every FULL_SYNC_INTERVAL also drops records deleted on the server.
+class InventoryMirror:
+    # kind -> (table, columns extracted from each record for indexing and reports)
+    TABLES = {
+        'users': ('users', {
+            'username': lambda r: r.get('username'),
+            'first_name': lambda r: r.get('first_name'),
+            'last_name': lambda r: r.get('last_name'),
+            'email': lambda r: r.get('email'),
+        }),
+        'models': ('models', {
+            'name': lambda r: r.get('name'),
+            'manufacturer_id': lambda r: ref_id(r.get('manufacturer')),
+        }),
+        'assets': ('assets', {
+            'sn': lambda r: r.get('sn'),
+            'barcode': lambda r: r.get('barcode'),
+            'status': lambda r: r.get('status'),
+            'user_id': lambda r: ref_id(r.get('user')),
+            'username': lambda r: ref_name(r.get('user'), 'username'),
+            'model_name': lambda r: ref_name(r.get('model')),
+            'warehouse_id': lambda r: ref_id(r.get('warehouse')),
+            'warehouse': lambda r: ref_name(r.get('warehouse')),
+        }),
+    }
+    INDEXES = [
+        ('users', 'username'),
+        ('assets', 'sn'),
+        ('assets', 'barcode'),
+        ('assets', 'status'),
+        ('assets', 'user_id'),
+        ('assets', 'username'),
+        ('assets', 'warehouse_id'),
+    ]
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Shared by the I/O workers; every statement runs under self.lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.RLock()
+        self.incremental_unsupported = set()
+        with self.lock:
+            for table, columns in self.TABLES.values():
+                column_sql = ''.join(f", {name} TEXT" for name in columns)
+                self.conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, modified TEXT{column_sql}, data TEXT NOT NULL)")
+            for table, column in self.INDEXES:
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_{column} ON {table} ({column})")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS sync_state (kind TEXT PRIMARY KEY, last_modified TEXT, full_sync REAL)")
+            self.conn.commit()
+
+    def upsert(self, kind, records):
+        table, columns = self.TABLES[kind]
+        names = ['id', 'modified'] + list(columns) + ['data']
+        rows = [
+            [record['id'], record.get('modified')] + [extract(record) for extract in columns.values()] + [json.dumps(record)]
+            for record in records
+        ]
+        with self.lock:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})", rows
+            )
+            self.conn.commit()
+
+    # Bring one kind up to date from the server and return all its records.
+    # on_page(records) sees each page of a full load, or everything at once after an incremental one.
+    def sync(self, api, kind, path, on_page=None):
+        table, _ = self.TABLES[kind]
+        with self.lock:
+            state = self.conn.execute("SELECT last_modified, full_sync FROM sync_state WHERE kind = ?", (kind,)).fetchone()
+        full = (not state or not state['last_modified'] or kind in self.incremental_unsupported
+                or time.time() - (state['full_sync'] or 0) > FULL_SYNC_INTERVAL)
+
+        if not full:
+            try:
+                changed = [record for page in api.fetch_pages(path, {'modified__gte': state['last_modified']}) for record in page]
+            except RalphAPIError as e:
+                if e.status_code != 400:
+                    raise
+                self.incremental_unsupported.add(kind)
+                full = True
+            else:
+                self.upsert(kind, changed)
+                self.save_state(kind, max([state['last_modified']] + [r['modified'] for r in changed if r.get('modified')]))
+                records = self.records(kind)
+                if on_page:
+                    on_page(records)
+                return records
+
+        seen = set()
+        last_modified = None
+        totals = {}
+        for page in api.fetch_pages(path, totals=totals):
+            self.upsert(kind, page)
+            seen.update(record['id'] for record in page)
+            last_modified = max([last_modified or ''] + [r['modified'] for r in page if r.get('modified')]) or None
+            if on_page:
+                on_page(page)
+        if len(seen) != totals.get('count'):
+            # Some records were missed (or the list changed while we read it), so absence proves nothing.
+            # Keep everything and leave full_sync as it was, so the next sync is a full one again.
+            self.save_state(kind, last_modified)
+            return self.records(kind)
+        with self.lock:
+            # Anything we did not see in a complete full load was deleted on the server
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen_ids (id INTEGER PRIMARY KEY)")
+            self.conn.execute("DELETE FROM seen_ids")
+            self.conn.executemany("INSERT OR IGNORE INTO seen_ids VALUES (?)", ((i,) for i in seen))
+            # (negative ids are placeholders for creates still waiting in the outbox)
+            self.conn.execute(f"DELETE FROM {table} WHERE id > 0 AND id NOT IN (SELECT id FROM seen_ids)")
+            self.conn.commit()
+        self.save_state(kind, last_modified, full_sync=time.time())
+        return self.records(kind)
+
+    def save_state(self, kind, last_modified, full_sync=None):
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO sync_state (kind, last_modified, full_sync) VALUES (?, ?, ?) "
+                "ON CONFLICT(kind) DO UPDATE SET last_modified = excluded.last_modified, "
+                "full_sync = COALESCE(excluded.full_sync, sync_state.full_sync)",
+                (kind, last_modified, full_sync)
+            )
+            self.conn.commit()
+
+    # Make the next sync of every kind a full reload
+    def expire(self):
+        with self.lock:
+            self.conn.execute("UPDATE sync_state SET full_sync = 0")
+            self.conn.commit()
+
+    def query(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def records(self, kind, where='', params=()):
+        table, _ = self.TABLES[kind]
+        return [json.loads(row['data']) for row in self.query(f"SELECT data FROM {table} {where} ORDER BY id", params)]
+
+    def user_assets(self, username):
+        return self.records('assets', "WHERE username = ? OR user_id = (SELECT id FROM users WHERE username = ?)", (username, username))
+
+    # (warehouse, free, new, return in progress, total available) per warehouse, busiest first
+    def available_per_warehouse(self):
+        return self.query(f"""
+            SELECT COALESCE(warehouse, 'Warehouse ' || warehouse_id, '(none)') AS warehouse,
+                   SUM(status = 'free') AS free,
+                   SUM(status = 'new') AS new,
+                   SUM(status = 'return in progress') AS in_return,
+                   COUNT(*) AS available
+            FROM assets
+            WHERE status IN ({', '.join('?' * len(AVAILABLE_STATUSES))})
+            GROUP BY 1
+            ORDER BY available DESC, warehouse
+        """, AVAILABLE_STATUSES)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+# Durable queue of our own writes to one server, kept in the mirror database. A write is journaled and
+# applied to the mirror straight away, then a sender thread replays the queue oldest first. Network
+# errors, 429 and 5xx keep the entry at the head of the queue and back off; anything else the server
+# refuses, or a change whose precondition no longer holds, is set aside as a conflict.
+class Outbox:
+    # List endpoints whose records are mirrored, and the field other writes use to refer to them
+    LIST_KINDS = {
+        '/api/users/': ('users', 'user'),
+        '/api/assetmodels/': ('models', 'model'),
+        '/api/back-office-assets/': ('assets', None),
+    }
+
+    def __init__(self, api, mirror):
+        self.api = api
+        self.mirror = mirror
+        self.listener = None
+        self.wake = threading.Event()
+        self.stopped = False
+        self.thread = None
+        with mirror.lock:
+            mirror.conn.execute('''
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created REAL NOT NULL,
+                    description TEXT NOT NULL,
+                    method TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    body TEXT,
+                    expected_status INTEGER NOT NULL,
+                    expect TEXT,
+                    state TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt REAL NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    response TEXT
+                )
+            ''')
+            mirror.conn.commit()
+
+    # Start replaying; listener(entry) is called from the sender thread whenever an entry settles
+    def start(self, listener=None):
+        self.listener = listener
+        if not self.thread:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+        self.wake.set()
+
+    # Stop replaying. With wait, also let a send already in flight finish and be recorded, so another
+    # sender can take over the queue without the same entry going out twice.
+    def stop(self, wait=False):
+        self.stopped = True
+        self.wake.set()
+        if wait and self.thread and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    # Journal a write and apply it to the mirror. expect maps fields of the current record to the
+    # values it may have for the change to still make sense, e.g. {'status': ['free', 'new']}.
+    # on_queued(entry_id) runs before the sender can see the entry, so a listener can be ready for it.
+    def enqueue(self, description, method, path, body, expected_status, expect=None, on_queued=None):
+        with self.mirror.lock:
+            # The caller may still hold a placeholder id (e.g. in a list loaded before the create was sent)
+            path, body = self.resolve_references(path, body)
+            cursor = self.mirror.conn.execute(
+                "INSERT INTO outbox (created, description, method, path, body, expected_status, expect) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), description, method, path, json.dumps(body), expected_status, json.dumps(expect) if expect else None)
+            )
+            self.mirror.conn.commit()
+            entry = self.entry(cursor.lastrowid)
+            self.apply_locally(entry)
+            if on_queued:
+                on_queued(entry['id'])  # Still under the lock the sender needs to read the queue
+        self.wake.set()
+        return entry['id']
+
+    def entry(self, entry_id):
+        row = self.mirror.query("SELECT * FROM outbox WHERE id = ?", (entry_id,))
+        return self.decode(row[0]) if row else None
+
+    def entries(self, states=('pending', 'conflict')):
+        rows = self.mirror.query(
+            f"SELECT * FROM outbox WHERE state IN ({', '.join('?' * len(states))}) ORDER BY id", tuple(states))
+        return [self.decode(row) for row in rows]
+
+    def pending_count(self):
+        return self.mirror.query("SELECT COUNT(*) FROM outbox WHERE state = 'pending'")[0][0]
+
+    @staticmethod
+    def decode(row):
+        entry = dict(row)
+        for field in ('body', 'expect', 'response'):
+            if entry[field]:
+                entry[field] = json.loads(entry[field])
+        return entry
+
+    # Which mirrored kind and record a write touches: (kind, id), id None for a create
+    def target(self, path):
+        for list_path, (kind, _) in self.LIST_KINDS.items():
+            if path == list_path:
+                return kind, None
+            if path.startswith(list_path) and path[len(list_path):].strip('/').lstrip('-').isdigit():
+                return kind, int(path[len(list_path):].strip('/'))
+        return None, None
+
+    # Show the change in the mirror before the server has it. Creates get a placeholder record with a
+    # negative id until the server assigns the real one.
+    def apply_locally(self, entry):
+        kind, record_id = self.target(entry['path'])
+        if not kind:
+            return
+        body = dict(entry['body'] or {})
+        if 'user' in body and body['user'] is not None:
+            user = self.mirror.query("SELECT id, username FROM users WHERE id = ?", (body['user'],))
+            if user:
+                body['user'] = {'id': user[0]['id'], 'username': user[0]['username']}
+        if record_id is None:
+            self.mirror.upsert(kind, [dict(body, id=-entry['id'])])
+        else:
+            current = self.mirror.records(kind, "WHERE id = ?", (record_id,))
+            if current:
+                self.mirror.upsert(kind, [dict(current[0], **body)])
+        self.api.invalidate(kind)
+
+    # Put the mirror back to the server's view after a change was refused
+    def revert_locally(self, entry, server_record=None):
+        kind, record_id = self.target(entry['path'])
+        if not kind:
+            return
+        table, _ = InventoryMirror.TABLES[kind]
+        if record_id is None:
+            with self.mirror.lock:
+                self.mirror.conn.execute(f"DELETE FROM {table} WHERE id = ?", (-entry['id'],))
+                self.mirror.conn.commit()
+        else:
+            if server_record is None:
+                try:
+                    server_record = self.api.get_json(entry['path'])
+                except (RalphAPIError, requests.RequestException):
+                    pass  # The next sync of this kind will correct it
+            if server_record:
+                self.mirror.upsert(kind, [server_record])
+        self.api.invalidate(kind)
+
+    # The real id of a placeholder whose create the server has made, or None while it is still queued
+    def created_id(self, placeholder):
+        rows = self.mirror.query("SELECT response FROM outbox WHERE id = ? AND response IS NOT NULL", (-placeholder,))
+        return json.loads(rows[0]['response']).get('id') if rows else None
+
+    # Point a write's path and reference fields at real ids where they name placeholders already created
+    def resolve_references(self, path, body):
+        kind, record_id = self.target(path)
+        if record_id is not None and record_id < 0 and self.created_id(record_id) is not None:
+            list_path = next(list_path for list_path, value in self.LIST_KINDS.items() if value[0] == kind)
+            path = f"{list_path}{self.created_id(record_id)}/"
+        if isinstance(body, dict):
+            for _, field in self.LIST_KINDS.values():
+                value = body.get(field) if field else None
+                if isinstance(value, int) and value < 0 and self.created_id(value) is not None:
+                    body = dict(body, **{field: self.created_id(value)})
+        return path, body
+
+    # The server created a record we had a placeholder for: store the real one and point queued
+    # writes that refer to the placeholder at it. The response is saved in the same transaction, so a
+    # write enqueued afterwards with the placeholder is mapped by resolve_references instead.
+    def resolve_placeholder(self, entry, record):
+        kind, _ = self.target(entry['path'])
+        placeholder = -entry['id']
+        table, _ = InventoryMirror.TABLES[kind]
+        _, reference_field = next(value for value in self.LIST_KINDS.values() if value[0] == kind)
+        list_path = next(path for path, value in self.LIST_KINDS.items() if value[0] == kind)
+        with self.mirror.lock:
+            self.mirror.conn.execute(f"DELETE FROM {table} WHERE id = ?", (placeholder,))
+            self.mirror.conn.commit()
+            if record.get('id') is None:
+                return
+            self.mirror.conn.execute("UPDATE outbox SET response = ? WHERE id = ?", (json.dumps(record), entry['id']))
+            self.mirror.upsert(kind, [record])
+            for queued in self.entries(states=('pending',)):
+                path, body = queued['path'], queued['body']
+                if path == f"{list_path}{placeholder}/":
+                    path = f"{list_path}{record['id']}/"
+                if reference_field and isinstance(body, dict) and body.get(reference_field) == placeholder:
+                    body = dict(body, **{reference_field: record['id']})
+                if (path, body) != (queued['path'], queued['body']):
+                    self.mirror.conn.execute("UPDATE outbox SET path = ?, body = ? WHERE id = ?",
+                                             (path, json.dumps(body), queued['id']))
+            self.mirror.conn.commit()
+
+    # Sender thread. An unexpected error (e.g. "database is locked" while another program has the mirror
+    # open) is logged, noted on the entry if possible, and waited out with backoff; it never ends the thread.
+    def run(self):
+        failures = 0
+        while not self.stopped:
+            entry = None
+            try:
+                pending = self.entries(states=('pending',))
+                if not pending:
+                    self.wake.wait()
+                    self.wake.clear()
+                    continue
+                entry = pending[0]
+                delay = entry['next_attempt'] - time.time()
+                if delay > 0:
+                    self.wake.wait(delay)
+                    self.wake.clear()
+                    continue
+                self.send(entry)
+                failures = 0
+            except Exception as e:
+                failures += 1
+                logger.exception("Outbox sender failed%s", f" on entry {entry['id']}" if entry else "")
+                if entry:
+                    try:
+                        self.retry_later(entry, f"Internal error: {e}")
+                    except Exception:
+                        pass  # The mirror itself is failing; just wait below
+                self.wake.wait(min(OUTBOX_BACKOFF_MAX, OUTBOX_BACKOFF_BASE * 2 ** (failures - 1)))
+                self.wake.clear()
+
+    def send(self, entry):
+        try:
+            if entry['expect'] and entry['method'] == 'PATCH':
+                current = self.api.get_json(entry['path'])
+                mismatches = [
+                    f"{field} is {ref_name(current.get(field), 'username') or ref_id(current.get(field))!r}"
+                    for field, allowed in entry['expect'].items()
+                    if ref_id(current.get(field)) not in allowed
+                ]
+                if mismatches:
+                    self.settle(entry, 'conflict', "Changed on the server: " + ", ".join(mismatches), server_record=current)
+                    return
+            response = self.api.request(entry['method'], entry['path'], json=entry['body'])
+        except RalphAPIError as e:
+            if e.status_code in RETRY_STATUSES:
+                self.retry_later(entry, f"HTTP {e.status_code}")
+            else:
+                self.settle(entry, 'conflict', f"HTTP {e.status_code}: {e}")
+            return
+        except requests.RequestException as e:
+            self.retry_later(entry, str(e))
+            return
+
+        if response.status_code in RETRY_STATUSES:
+            self.retry_later(entry, f"HTTP {response.status_code}")
+            return
+        try:
+            record = response.json()
+        except ValueError:
+            record = None
+        if response.status_code != entry['expected_status']:
+            self.settle(entry, 'conflict', f"HTTP {response.status_code}: {response.text[:300]}")
+            return
+
+        kind, record_id = self.target(entry['path'])
+        if kind and isinstance(record, dict):
+            if record_id is None:
+                self.resolve_placeholder(entry, record)
+            elif record.get('id') is not None:
+                self.mirror.upsert(kind, [record])
+            self.api.invalidate(kind)
+        self.settle(entry, 'sent', None, response=record)
+
+    def retry_later(self, entry, error):
+        attempts = entry['attempts'] + 1
+        delay = min(OUTBOX_BACKOFF_MAX, OUTBOX_BACKOFF_BASE * 2 ** (attempts - 1))
+        with self.mirror.lock:
+            self.mirror.conn.execute("UPDATE outbox SET attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?",
+                                     (attempts, time.time() + delay, error, entry['id']))
+            self.mirror.conn.commit()
+        if self.listener:
+            self.listener(self.entry(entry['id']))
+
+    def settle(self, entry, state, error, response=None, server_record=None):
+        if state == 'conflict':
+            self.revert_locally(entry, server_record)
+        with self.mirror.lock:
+            self.mirror.conn.execute("UPDATE outbox SET state = ?, attempts = attempts + 1, last_error = ?, response = ? WHERE id = ?",
+                                     (state, error, json.dumps(response) if response is not None else None, entry['id']))
+            self.mirror.conn.commit()
+        if self.listener:
+            self.listener(self.entry(entry['id']))
+
+    # Send a conflicted entry again as it is, or drop it
+    def retry(self, entry_id):
+        with self.mirror.lock:
+            self.mirror.conn.execute("UPDATE outbox SET state = 'pending', next_attempt = 0, expect = NULL WHERE id = ?", (entry_id,))
+            self.mirror.conn.commit()
+            self.apply_locally(self.entry(entry_id))
+        self.wake.set()
+
+    def discard(self, entry_id):
+        with self.mirror.lock:
+            entry = self.entry(entry_id)
+            self.mirror.conn.execute("UPDATE outbox SET state = 'discarded' WHERE id = ?", (entry_id,))
+            self.mirror.conn.commit()
+        if entry and entry['state'] == 'pending':
+            self.revert_locally(entry)
+
+    # Skip the backoff wait, e.g. once the user knows the network is back
+    def retry_now(self):
+        with self.mirror.lock:
+            self.mirror.conn.execute("UPDATE outbox SET next_attempt = 0 WHERE state = 'pending'")
+            self.mirror.conn.commit()
+        self.wake.set()
+
+# Per-endpoint request statistics for one client: count, errors, latency percentiles, bytes received
+# and JSON decode time, plus a rolling log of slow or failed requests. Endpoints are paths with ids
+# replaced by {id}, so /api/back-office-assets/12/ and /13/ count together.
+class RequestMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.slow_log = deque(maxlen=SLOW_LOG_SIZE)
+
+    @staticmethod
+    def endpoint(method, path):
+        return f"{method} {re.sub(r'/-?[0-9]+/', '/{id}/', path)}"
+
+    def stats(self, method, path):
+        key = self.endpoint(method, path)
+        if key not in self.endpoints:
+            self.endpoints[key] = {'count': 0, 'errors': 0, 'bytes': 0, 'decode_seconds': 0.0, 'decodes': 0,
+                                   'latencies': deque(maxlen=LATENCY_SAMPLES), 'last_error': None}
+        return self.endpoints[key]
+
+    # status is None when the request never got a response
+    def record(self, method, path, params, status, seconds, size, error=None):
+        failed = status is None or status >= 400
+        with self.lock:
+            stats = self.stats(method, path)
+            stats['count'] += 1
+            stats['bytes'] += size
+            stats['latencies'].append(seconds)
+            if failed:
+                stats['errors'] += 1
+                stats['last_error'] = error or f"HTTP {status}"
+            if failed or seconds >= SLOW_REQUEST_SECONDS:
+                self.slow_log.append({
+                    'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'request': f"{method} {path}" + (f"?{'&'.join(f'{k}={v}' for k, v in params.items())}" if params else ''),
+                    'status': status,
+                    'seconds': round(seconds, 3),
+                    'bytes': size,
+                    'error': error,
+                })
+
+    def record_decode(self, method, path, seconds):
+        with self.lock:
+            stats = self.stats(method, path)
+            stats['decode_seconds'] += seconds
+            stats['decodes'] += 1
+
+    # One row per endpoint, slowest p95 first, with latencies in milliseconds
+    def summary(self):
+        with self.lock:
+            rows = []
+            for endpoint, stats in self.endpoints.items():
+                latencies = sorted(stats['latencies'])
+                pick = lambda pct: latencies[min(len(latencies) - 1, round(pct / 100 * (len(latencies) - 1)))] * 1000 if latencies else 0.0
+                rows.append({
+                    'endpoint': endpoint,
+                    'count': stats['count'],
+                    'errors': stats['errors'],
+                    'error_rate': stats['errors'] / stats['count'] if stats['count'] else 0.0,
+                    'p50_ms': round(pick(50), 1),
+                    'p95_ms': round(pick(95), 1),
+                    'p99_ms': round(pick(99), 1),
+                    'bytes': stats['bytes'],
+                    'json_ms': round(stats['decode_seconds'] * 1000, 1),
+                    'json_ms_avg': round(stats['decode_seconds'] * 1000 / stats['decodes'], 2) if stats['decodes'] else 0.0,
+                    'last_error': stats['last_error'],
+                })
+            return sorted(rows, key=lambda row: row['p95_ms'], reverse=True)
+
+    def slow_requests(self):
+        with self.lock:
+            return list(self.slow_log)
+
+    def reset(self):
+        with self.lock:
+            self.endpoints.clear()
+            self.slow_log.clear()
+
+# Keep-alive session for one Ralph server, with timeouts and retries on every call
+class RalphClient:
+    def __init__(self, server):
+        self.base_url = server['url'].rstrip('/')
+        self.api_token = server['api_token']
+        self.metrics = RequestMetrics()
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Authorization': f'Token {server["api_token"]}',
+            'Content-Type': 'application/json'
+        })
+        retry = Retry(
+            total=RETRY_TOTAL,
+            backoff_factor=RETRY_BACKOFF,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.ttls = dict(CACHE_TTLS, **server.get('cache_ttl', {}))
+        self.cache = {}       # kind -> (fetched_at, records)
+        self.validators = OrderedDict()  # (path, params) -> (etag, last_modified, payload) for conditional GETs
+        self.rejected_params = set()  # Paths (or (path, filter)) where the server refused our optional filters
+        try:
+            self.mirror = InventoryMirror(mirror_path(self.base_url))
+        except (OSError, sqlite3.Error):
+            self.mirror = None  # No writable mirror location; everything is fetched live instead
+        self.outbox = Outbox(self, self.mirror) if self.mirror else None
+        self.lock = threading.Lock()
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault('timeout', REQUEST_TIMEOUT)
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, f'{self.base_url}{path}', **kwargs)
+        except requests.RequestException as e:
+            self.metrics.record(method, path, kwargs.get('params'), None, time.perf_counter() - started, 0, str(e))
+            raise
+        self.metrics.record(method, path, kwargs.get('params'), response.status_code,
+                            time.perf_counter() - started, len(response.content))
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def patch(self, path, **kwargs):
+        return self.request('PATCH', path, **kwargs)
+
+    # GET and decode JSON. With conditional=True (cached_list pages) the response's ETag or Last-Modified
+    # is kept with the payload, the next request for it is made conditional, and a 304 reuses the earlier
+    # payload instead of downloading it again. One-off lookups leave it off so nothing is retained.
+    def get_json(self, path, params=None, conditional=False, **kwargs):
+        key = (path, tuple(sorted((params or {}).items())))
+        validator = None
+        if conditional:
+            with self.lock:
+                validator = self.validators.get(key)
+                if validator:
+                    self.validators.move_to_end(key)
+        headers = {}
+        if validator:
+            etag, last_modified, _ = validator
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        response = self.get(path, params=params, headers=headers, **kwargs)
+        if response.status_code == 304 and validator:
+            return validator[2]
+        if response.status_code != 200:
+            raise RalphAPIError(response)
+        started = time.perf_counter()
+        payload = response.json()
+        self.metrics.record_decode('GET', path, time.perf_counter() - started)
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if conditional and (etag or last_modified):
+            with self.lock:
+                self.validators[key] = (etag, last_modified, payload)
+                self.validators.move_to_end(key)
+                while len(self.validators) > VALIDATOR_LIMIT:
+                    self.validators.popitem(last=False)
+        return payload
+
+    # Return every record of a list endpoint, from the cache while it is younger than the kind's TTL.
+    # on_page(records) is called for each page as it arrives, or once with everything on a cache hit.
+    # optional_params are only sent until the server answers 400 to them once for this path.
+    def cached_list(self, kind, path, params=None, on_page=None, force=False, optional_params=None):
+        with self.lock:
+            entry = self.cache.get(kind)
+        if entry and not force and time.monotonic() - entry[0] < self.ttls.get(kind, 0):
+            if on_page:
+                on_page(entry[1])
+            return entry[1]
+
+        if self.mirror and kind in InventoryMirror.TABLES and not params:
+            # Mirrored lists come from the local copy after an incremental sync; optional server-side
+            # filters are not needed because the mirror holds every record anyway
+            records = self.mirror.sync(self, kind, path, on_page)
+            with self.lock:
+                self.cache[kind] = (time.monotonic(), records)
+            return records
+
+        pages = None
+        if optional_params and path not in self.rejected_params:
+            pages = self.fetch_pages(path, dict(params or {}, **optional_params), conditional=True)
+            try:
+                first = next(pages)
+            except RalphAPIError as e:
+                if e.status_code != 400:
+                    raise
+                with self.lock:
+                    self.rejected_params.add(path)
+                pages = None
+            except StopIteration:
+                first = []
+            if pages is not None:
+                pages = itertools.chain([first], pages)
+        if pages is None:
+            pages = self.fetch_pages(path, params, conditional=True)
+
+        records = []
+        for page in pages:
+            records.extend(page)
+            if on_page:
+                on_page(page)
+        with self.lock:
+            self.cache[kind] = (time.monotonic(), records)
+        return records
+
+    # A user's id from the mirror or the cached user list, without asking the server
+    def known_user_id(self, username):
+        if self.mirror:
+            rows = self.mirror.query("SELECT id FROM users WHERE username = ? AND id > 0", (username,))
+            if rows:
+                return rows[0]['id']
+        with self.lock:
+            entry = self.cache.get('users')
+        for user in entry[1] if entry else []:
+            if user.get('username') == username and user.get('id', 0) > 0:
+                return user['id']
+        return None
+
+    # Drop cached lists (all of them if no kinds are given), e.g. after we change data on the server
+    def invalidate(self, *kinds):
+        with self.lock:
+            for kind in kinds or list(self.cache):
+                self.cache.pop(kind, None)
+
+    # {'regions': {name: id}, 'warehouses': ..., 'manufacturers': ...}, each list from the cache or
+    # fetched alongside the others
+    def reference_maps(self):
+        with ThreadPoolExecutor(max_workers=len(REFERENCE_LISTS)) as pool:
+            futures = {kind: pool.submit(self.cached_list, kind, path) for kind, path in REFERENCE_LISTS.items()}
+            return {kind: {record['name']: record['id'] for record in future.result()} for kind, future in futures.items()}
+
+    # Yield every page of a list endpoint. The first page gives the total count and the page size the
+    # server actually uses (it may cap our limit); the remaining offsets are then fetched concurrently
+    # and yielded in whatever order they complete. A page that comes back short leaves a gap, which is
+    # read afterwards. If totals (a dict) is given it receives 'count' and 'received' so callers can
+    # tell whether they saw every record. conditional is passed on to get_json.
+    def fetch_pages(self, path, params=None, page_size=PAGE_SIZE, max_workers=PAGE_WORKERS, conditional=False, totals=None):
+        params = dict(params or {}, limit=page_size)
+        first = self.get_json(path, params=dict(params, offset=0), conditional=conditional)
+        if isinstance(first, list):
+            # Unpaginated endpoint: everything came back at once
+            if totals is not None:
+                totals.update(count=len(first), received=len(first))
+            yield first
+            return
+        records = first.get('results', [])
+        count = first.get('count') or 0
+        received = len(records)
+        yield records
+
+        step = len(records)
+        gaps = []
+        if step:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = {pool.submit(self.get_json, path, dict(params, offset=offset), conditional): offset
+                           for offset in range(step, count, step)}
+                try:
+                    for future in as_completed(futures):
+                        records = future.result().get('results', [])
+                        offset = futures[future]
+                        end = min(offset + step, count)
+                        if offset + len(records) < end:
+                            gaps.append((offset + len(records), end))
+                        received += len(records)
+                        yield records
+                finally:
+                    # Stop fetching if the caller gave up early or a page failed
+                    for future in futures:
+                        future.cancel()
+
+        for offset, end in gaps:
+            while offset < end:
+                records = self.get_json(path, params=dict(params, offset=offset, limit=end - offset),
+                                        conditional=conditional).get('results', [])
+                if not records:
+                    break
+                received += len(records)
+                offset += len(records)
+                yield records
+
+        if received != count:
+            logger.warning("%s: server reported %d records but %d were received", path, count, received)
+        if totals is not None:
+            totals.update(count=count, received=received)
+
+    # Yield (records, count) for each page of a list endpoint in order, one page at a time, with the
+    # next page already being fetched while the caller handles the current one. Pages are not kept for
+    # revalidation, so memory use is at most two pages however large the endpoint is.
+    def iter_pages(self, path, params=None, page_size=PAGE_SIZE):
+        params = dict(params or {}, limit=page_size)
+        with ThreadPoolExecutor(max_workers=1) as prefetch:
+            future = prefetch.submit(self.get_json, path, dict(params, offset=0))
+            offset = 0
+            while future:
+                payload = future.result()
+                if isinstance(payload, list):
+                    yield payload, len(payload)
+                    return
+                records = payload.get('results', [])
+                offset += len(records)
+                future = None
+                more = payload['next'] if 'next' in payload else offset < (payload.get('count') or 0)
+                if more and records:
+                    future = prefetch.submit(self.get_json, path, dict(params, offset=offset))
+                yield records, payload.get('count')
+
+    def close(self):
+        if self.outbox:
+            self.outbox.stop(wait=True)
+        self.session.close()
+        if self.mirror:
+            self.mirror.close()
+
+# Substring search over a fixed set of labels (usernames, serial numbers), each with the text fields
+# it should match on. Every suffix of every field goes into one sorted array, so a substring query is
+# a bisect to the first suffix starting with it plus a short scan. Build it off the Tk thread.
+class PrefixIndex:
+    def __init__(self, fields_by_label=None):
+        self.fields = {label: [field.lower() for field in fields if field]
+                       for label, fields in (fields_by_label or {}).items()}
+        self.sorted_labels = sorted(self.fields)
+        self.lowered_labels = [label.lower() for label in self.sorted_labels]
+        lowered_order = sorted(range(len(self.sorted_labels)), key=self.lowered_labels.__getitem__)
+        self.prefix_keys = [self.lowered_labels[i] for i in lowered_order]
+        self.prefix_labels = [self.sorted_labels[i] for i in lowered_order]
+
+        entries = sorted(
+            (field[start:start + SUFFIX_LENGTH], label)
+            for label, fields in self.fields.items()
+            for field in fields
+            for start in range(len(field))
+        )
+        self.suffixes = [suffix for suffix, _ in entries]
+        self.suffix_labels = [label for _, label in entries]
+
+    def __len__(self):
+        return len(self.sorted_labels)
+
+    # Labels matching text: those starting with it first, then those with it anywhere in a field
+    def search(self, text, limit=MATCH_LIMIT):
+        query = text.strip().lower()
+        if not query:
+            return self.sorted_labels
+
+        matches = []
+        seen = set()
+        start = bisect_left(self.prefix_keys, query)
+        for key, label in zip(self.prefix_keys[start:start + limit], self.prefix_labels[start:start + limit]):
+            if not key.startswith(query):
+                break
+            matches.append(label)
+            seen.add(label)
+
+        others = []
+        probe = query[:SUFFIX_LENGTH]
+        for i in range(bisect_left(self.suffixes, probe), len(self.suffixes)):
+            if len(matches) + len(others) >= limit or not self.suffixes[i].startswith(probe):
+                break
+            label = self.suffix_labels[i]
+            if label in seen:
+                continue
+            seen.add(label)
+            if len(query) > SUFFIX_LENGTH and not any(query in field for field in self.fields[label]):
+                continue
+            others.append(label)
+        return matches + sorted(others)
+
+# Read a CSV into a list of dicts with lower-cased, trimmed column names and values
+def read_csv_rows(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+        rows = [{name: (value or '').strip() for name, value in zip(fieldnames, row.values())} for row in reader]
+    return fieldnames, rows
+
+# One CSV row on its way through a bulk run. data is the request body once the row has validated.
+def bulk_item(line, row, data=None, error=None):
+    return {'line': line, 'row': row, 'data': data, 'result': 'invalid' if error else 'pending',
+            'message': error or '', 'id': ''}
+
+def check_columns(fieldnames, required):
+    missing = [name for name in required if name not in fieldnames]
+    if missing:
+        raise ValueError(f"CSV is missing column(s): {', '.join(missing)}")
+
+# Validate laptop intake rows against the asset models on the server and its regions, warehouses and
+# manufacturers (RalphClient.reference_maps). The manufacturer comes from a manufacturer column or the model.
+def validate_laptop_rows(fieldnames, rows, models, reference):
+    check_columns(fieldnames, LAPTOP_CSV_COLUMNS)
+    models_by_name = {model['name']: model for model in models}
+    seen_sns, seen_barcodes = set(), set()
+    items = []
+    for line, row in enumerate(rows, start=2):
+        errors = [f"{name} is empty" for name in LAPTOP_CSV_COLUMNS if not row.get(name)]
+        model = models_by_name.get(row.get('model'))
+        if row.get('model') and not model:
+            errors.append(f"unknown model '{row['model']}'")
+        if row.get('region') and row['region'] not in reference['regions']:
+            errors.append(f"unknown region '{row['region']}'")
+        if row.get('warehouse') and row['warehouse'] not in reference['warehouses']:
+            errors.append(f"unknown warehouse '{row['warehouse']}'")
+        try:
+            if row.get('price') and float(row['price']) < 0:
+                errors.append("price is negative")
+        except ValueError:
+            errors.append(f"price '{row['price']}' is not a number")
+
+        manufacturer_id = None
+        if row.get('manufacturer'):
+            manufacturer_id = reference['manufacturers'].get(row['manufacturer'])
+            if manufacturer_id is None:
+                errors.append(f"unknown manufacturer '{row['manufacturer']}'")
+        elif model:
+            manufacturer = model.get('manufacturer')
+            manufacturer_id = manufacturer.get('id') if isinstance(manufacturer, dict) else manufacturer
+            if manufacturer_id is None:
+                errors.append("model has no manufacturer; add a manufacturer column")
+
+        if row.get('sn') in seen_sns:
+            errors.append("serial number repeated in file")
+        if row.get('barcode') in seen_barcodes:
+            errors.append("barcode repeated in file")
+        seen_sns.add(row.get('sn'))
+        seen_barcodes.add(row.get('barcode'))
+
+        if errors:
+            items.append(bulk_item(line, row, error='; '.join(errors)))
+            continue
+        items.append(bulk_item(line, row, {
+            "model": model['id'],
+            "sn": row['sn'],
+            "barcode": row['barcode'],
+            "type": "back office",
+            "status": "new",
+            "region": reference['regions'][row['region']],
+            "warehouse": reference['warehouses'][row['warehouse']],
+            "price": row['price'],
+            "price_currency": row.get('price_currency') or DEFAULT_CURRENCY,
+            "manufacturer": manufacturer_id,
+            "category": "laptop"
+        }))
+    return items
+
+# Validate sn -> username rows against the users and the laptops available for assignment
+def validate_assignment_rows(fieldnames, rows, users, laptops):
+    check_columns(fieldnames, ASSIGN_CSV_COLUMNS)
+    user_ids = {user['username']: user['id'] for user in users}
+    laptop_ids = {laptop['sn']: laptop['id'] for laptop in laptops}
+    seen_sns = set()
+    items = []
+    for line, row in enumerate(rows, start=2):
+        errors = [f"{name} is empty" for name in ASSIGN_CSV_COLUMNS if not row.get(name)]
+        if row.get('sn') and row['sn'] not in laptop_ids:
+            errors.append(f"no available laptop with serial number '{row['sn']}'")
+        if row.get('username') and row['username'] not in user_ids:
+            errors.append(f"unknown user '{row['username']}'")
+        if row.get('sn') in seen_sns:
+            errors.append("serial number repeated in file")
+        seen_sns.add(row.get('sn'))
+
+        if errors:
+            items.append(bulk_item(line, row, error='; '.join(errors)))
+            continue
+        item = bulk_item(line, row, {"user": user_ids[row['username']], "status": "in use"})
+        item['id'] = laptop_ids[row['sn']]
+        items.append(item)
+    return items
+
+# Send every validated item with at most max_workers requests in flight. send(api, item) returns the
+# response; anything but expected_status marks the row failed. on_progress(done, total) follows along.
+def send_bulk(api, items, send, expected_status, on_progress=None, max_workers=BULK_WORKERS):
+    pending = [item for item in items if item['data'] is not None]
+
+    def run(item):
+        try:
+            response = send(api, item)
+        except requests.RequestException as e:
+            item['result'], item['message'] = 'failed', str(e)
+            return
+        if response.status_code == expected_status:
+            item['result'] = 'ok'
+            try:
+                item['id'] = response.json().get('id', item['id'])
+            except ValueError:
+                pass
+        else:
+            item['result'], item['message'] = 'failed', f"HTTP {response.status_code}: {response.text[:200]}"
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(run, item) for item in pending]
+        try:
+            for done, future in enumerate(as_completed(futures), start=1):
+                future.result()
+                if on_progress:
+                    on_progress(done, len(pending))
+        finally:
+            for future in futures:
+                future.cancel()
+    return items
+
+# Write <name>_report.csv with every row and its outcome, and <name>_retry.csv with the rows that did
+# not go through (invalid or failed) in the original columns, ready to be fixed and run again
+def write_bulk_report(csv_path, fieldnames, items):
+    base, _ = os.path.splitext(csv_path)
+    report_path, retry_path = f"{base}_report.csv", f"{base}_retry.csv"
+    with open(report_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['line'] + fieldnames + ['result', 'message', 'id'], extrasaction='ignore')
+        writer.writeheader()
+        for item in items:
+            writer.writerow(dict(item['row'], line=item['line'], result=item['result'], message=item['message'], id=item['id']))
+
+    retry = [item['row'] for item in items if item['result'] != 'ok']
+    if retry:
+        with open(retry_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(retry)
+    elif os.path.exists(retry_path):
+        os.remove(retry_path)
+    return report_path, (retry_path if retry else None)
+
+# The manufacturer is nested in the model when the API expands it, otherwise it is on the asset
+def asset_manufacturer(asset):
+    model = asset.get('model')
+    manufacturer = model.get('manufacturer') if isinstance(model, dict) else asset.get('manufacturer')
+    return ref_name(manufacturer) or ref_id(manufacturer)
+
+# Columns of the asset export, each taken from a back-office asset record
+EXPORT_COLUMNS = {
+    'id': lambda a: a.get('id'),
+    'sn': lambda a: a.get('sn'),
+    'barcode': lambda a: a.get('barcode'),
+    'status': lambda a: a.get('status'),
+    'username': lambda a: ref_name(a.get('user'), 'username') or ref_id(a.get('user')),
+    'user_name': lambda a: ' '.join(filter(None, [ref_name(a.get('user'), 'first_name'), ref_name(a.get('user'), 'last_name')])),
+    'model': lambda a: ref_name(a.get('model')) or ref_id(a.get('model')),
+    'manufacturer': asset_manufacturer,
+    'warehouse': lambda a: ref_name(a.get('warehouse')) or ref_id(a.get('warehouse')),
+    'region': lambda a: ref_name(a.get('region')) or ref_id(a.get('region')),
+    'price': lambda a: a.get('price'),
+    'price_currency': lambda a: a.get('price_currency'),
+    'invoice_date': lambda a: a.get('invoice_date'),
+    'modified': lambda a: a.get('modified'),
 }
 
+# Stream every back-office asset to a CSV or JSON-lines file (chosen by the .jsonl/.json extension),
+# writing each page as it arrives into <path>.part and renaming it when complete.
+# on_progress(rows, total, rows_per_second) is called after each page.
+def export_assets(api, path, on_progress=None, check=None):
+    json_lines = os.path.splitext(path)[1].lower() in ('.jsonl', '.json')
+    part_path = path + '.part'
+    started = time.monotonic()
+    rows = 0
+    try:
+        with open(part_path, 'w', newline='', encoding='utf-8') as f:
+            writer = None if json_lines else csv.DictWriter(f, fieldnames=list(EXPORT_COLUMNS))
+            if writer:
+                writer.writeheader()
+            for records, total in api.iter_pages('/api/back-office-assets/'):
+                if check:
+                    check()
+                for record in records:
+                    row = {name: extract(record) for name, extract in EXPORT_COLUMNS.items()}
+                    if writer:
+                        writer.writerow(row)
+                    else:
+                        f.write(json.dumps(row) + '\n')
+                rows += len(records)
+                if on_progress:
+                    on_progress(rows, total, rows / max(time.monotonic() - started, 1e-6))
+        os.replace(part_path, path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    return rows
+
+# A user's back-office assets on one server, or None if there is no such user. The user's id is taken
+# from the client's local data when known; otherwise the assets are filtered by username on the server
+# (user__username), so a search is normally one request. Servers that refuse or ignore that filter
+# get the two-step lookup (user, then their assets). Runs on a worker thread.
+def find_user_assets(api, username, **kwargs):
+    path = '/api/back-office-assets/'
+    user_id = api.known_user_id(username)
+    if user_id is None and (path, 'user__username') not in api.rejected_params:
+        try:
+            assets = api.get_json(path, params={'user__username': username}, **kwargs).get('results', [])
+        except RalphAPIError as e:
+            if e.status_code != 400:
+                raise
+            api.rejected_params.add((path, 'user__username'))
+        else:
+            if assets and all(ref_name(asset.get('user'), 'username') == username for asset in assets):
+                return assets
+            if assets:
+                api.rejected_params.add((path, 'user__username'))  # The filter was ignored
+            else:
+                # Nothing assigned; only a user lookup can tell an unknown username from an empty one
+                users = api.get_json('/api/users/', params={'username': username}, **kwargs).get('results', [])
+                return [] if users else None
+
+    if user_id is None:
+        users = api.get_json('/api/users/', params={'username': username}, **kwargs).get('results', [])
+        if not users:
+            return None
+        user_id = users[0]['id']
+    return api.get_json(path, params={'user': user_id}, **kwargs).get('results', [])
+
+# Back-office assets with exactly this serial number on one server. Runs on a worker thread.
+def find_serial(api, sn, **kwargs):
+    assets = api.get_json('/api/back-office-assets/', params={'sn': sn}, **kwargs).get('results', [])
+    return [asset for asset in assets if asset.get('sn') == sn]
+
+class TaskCancelled(Exception):
+    pass
+
+# A unit of background work started by RalphGUI.run_in_background
+class BackgroundTask:
+    def __init__(self, key, description, on_done, on_error, tab=None):
+        self.key = key
+        self.description = description
+        self.on_done = on_done
+        self.on_error = on_error
+        self.tab = tab
+        self.cancelled = False
+
+    # Called by the worker between requests so a cancelled task stops early
+    def check(self):
+        if self.cancelled:
+            raise TaskCancelled()
+
 class RalphGUI(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Ralph Manager")
         self.servers = self.load_servers()
         self.server_info = {}
+        self.clients = {}  # One RalphClient per server URL (its mirror and outbox are per URL too)
+        self.retiring = {}  # URL -> future of closing a replaced client, which must finish before its successor sends
+        self.io_pool = ThreadPoolExecutor(max_workers=IO_WORKERS)
+        self.ui_queue = queue.Queue()
+        self.tasks = {}  # key -> BackgroundTask, for tasks still running
+        self.write_callbacks = {}  # (client, outbox entry id) -> (on_done, failure) for writes queued this session
+        self.outbox_pending = 0
         self.load_default_server()
         self.laptop_model_map = {}  # Initialize the laptop_model_map
+        self.user_map = {}
+        self.reference = {kind: {} for kind in REFERENCE_LISTS}  # Name -> id maps for the current server
+        self.user_index = PrefixIndex()    # Type-ahead over usernames, names and email addresses
+        self.laptop_index = PrefixIndex()  # Type-ahead over available serial numbers
 
         # Create menu
         self.create_menu()
@@ -69,17 +1271,69 @@ class RalphGUI(tk.Tk):
         self.create_assign_laptop_tab()
         self.create_user_assets_tab()
 
+        # Status bar showing what is loading in the background
+        status_bar = tk.Frame(self)
+        status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.status_label = tk.Label(status_bar, text="Ready", anchor="w")
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.progress = ttk.Progressbar(status_bar, mode="indeterminate", length=120)
+        self.progress.pack(side=tk.RIGHT, padx=5, pady=2)
+
         # Bind tab change event to refresh data
         self.tabControl.bind("<<NotebookTabChanged>>", self.on_tab_change)
 
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.after(UI_POLL_MS, self.drain_ui_queue)
+        self.connect()
+
+    # Open the client for the selected server, resume sending any changes queued for it and start
+    # loading the regions, warehouses and manufacturers the forms need
+    def connect(self):
+        if not self.server_info:
+            return
+        api = self.api
+        if api.outbox:
+            self.outbox_pending = api.outbox.pending_count()
+            self.update_status()
+        # Names loaded from the previous server may have other ids on this one
+        self.reference = {kind: {} for kind in REFERENCE_LISTS}
+        self.update_reference_data()
+
+    # Abandon outstanding loads and close without waiting for in-flight requests
+    def on_close(self):
+        self.cancel_tasks()
+        self.io_pool.shutdown(wait=False, cancel_futures=True)
+        self.destroy()
+
     def create_menu(self):
         menubar = tk.Menu(self)
         self.config(menu=menubar)
 
+        file_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="File", menu=file_menu)
+        file_menu.add_command(label="Bulk Add Laptops from CSV...", command=self.bulk_add_laptops)
+        file_menu.add_command(label="Bulk Assign Laptops from CSV...", command=self.bulk_assign_laptops)
+        file_menu.add_separator()
+        file_menu.add_command(label="Export Assets...", command=self.export_assets)
+
         settings_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Settings", menu=settings_menu)
         settings_menu.add_command(label="Server Manager", command=self.server_selection_dialog)
 
+        view_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="View", menu=view_menu)
+        view_menu.add_command(label="Refresh Data", accelerator="F5", command=self.refresh_data)
+        view_menu.add_command(label="Pending Changes...", command=self.pending_changes_dialog)
+        self.bind_all("<F5>", lambda event: self.refresh_data())
+
+        reports_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Reports", menu=reports_menu)
+        reports_menu.add_command(label="Available Laptops per Warehouse", command=self.available_laptops_report)
+
+        help_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Help", menu=help_menu)
+        help_menu.add_command(label="Diagnostics...", command=self.diagnostics_dialog)
+
     def create_add_user_tab(self):
         tk.Label(self.add_user_tab, text="Username:").grid(row=0, column=0, padx=10, pady=10)
         self.username_entry = tk.Entry(self.add_user_tab)
@@ -114,17 +1368,14 @@ class RalphGUI(tk.Tk):
 
         tk.Label(self.add_laptop_tab, text="Region:").grid(row=3, column=0, padx=10, pady=10)
         self.region_combo = ttk.Combobox(self.add_laptop_tab, state="readonly", width=50)
-        self.region_combo['values'] = list(REGIONS.keys())
         self.region_combo.grid(row=3, column=1, padx=10, pady=10)
 
         tk.Label(self.add_laptop_tab, text="Warehouse:").grid(row=4, column=0, padx=10, pady=10)
         self.warehouse_combo = ttk.Combobox(self.add_laptop_tab, state="readonly", width=50)
-        self.warehouse_combo['values'] = list(WAREHOUSES.keys())
         self.warehouse_combo.grid(row=4, column=1, padx=10, pady=10)
 
         tk.Label(self.add_laptop_tab, text="Manufacturer:").grid(row=5, column=0, padx=10, pady=10)
         self.manufacturer_combo = ttk.Combobox(self.add_laptop_tab, state="readonly", width=50)
-        self.manufacturer_combo['values'] = list(MANUFACTURERS.keys())
         self.manufacturer_combo.grid(row=5, column=1, padx=10, pady=10)
 
         tk.Label(self.add_laptop_tab, text="Price:").grid(row=6, column=0, padx=10, pady=10)
@@ -144,19 +1395,20 @@ class RalphGUI(tk.Tk):
 
         tk.Label(self.add_model_tab, text="Manufacturer:").grid(row=1, column=0, padx=10, pady=10)
         self.manufacturer_combo_model = ttk.Combobox(self.add_model_tab, state="readonly", width=50)
-        self.manufacturer_combo_model['values'] = list(MANUFACTURERS.keys())
         self.manufacturer_combo_model.grid(row=1, column=1, padx=10, pady=10)
 
         tk.Button(self.add_model_tab, text="Add Model", command=self.add_model).grid(row=2, column=0, columnspan=2, pady=10)
 
     def create_assign_laptop_tab(self):
         tk.Label(self.assign_laptop_tab, text="Select User:").grid(row=0, column=0, padx=10, pady=10)
-        self.user_combo = ttk.Combobox(self.assign_laptop_tab, state="readonly", width=50)
+        self.user_combo = ttk.Combobox(self.assign_laptop_tab, width=50)
         self.user_combo.grid(row=0, column=1, padx=10, pady=10)
+        self.user_combo.bind("<KeyRelease>", lambda event: self.filter_users())
 
         tk.Label(self.assign_laptop_tab, text="Select Laptop Serial Number:").grid(row=1, column=0, padx=10, pady=10)
-        self.laptop_model_combo = ttk.Combobox(self.assign_laptop_tab, state="readonly", width=50)
+        self.laptop_model_combo = ttk.Combobox(self.assign_laptop_tab, width=50)
         self.laptop_model_combo.grid(row=1, column=1, padx=10, pady=10)
+        self.laptop_model_combo.bind("<KeyRelease>", lambda event: self.filter_laptops())
 
         tk.Button(self.assign_laptop_tab, text="Assign Laptop", command=self.assign_laptop).grid(row=2, column=0, pady=10)
 
@@ -166,71 +1418,361 @@ class RalphGUI(tk.Tk):
         self.search_user_entry.grid(row=0, column=1, padx=10, pady=10)
         tk.Button(self.user_assets_tab, text="Search", command=self.search_user_assets).grid(row=0, column=2, padx=10, pady=10)
 
+        tk.Label(self.user_assets_tab, text="Serial Number:").grid(row=1, column=0, padx=10, pady=10)
+        self.search_sn_entry = tk.Entry(self.user_assets_tab)
+        self.search_sn_entry.grid(row=1, column=1, padx=10, pady=10)
+        tk.Button(self.user_assets_tab, text="Find", command=self.find_serial).grid(row=1, column=2, padx=10, pady=10)
+
+        self.all_servers_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.user_assets_tab, text="Search all servers", variable=self.all_servers_var).grid(row=2, column=0, columnspan=3, padx=10, sticky="w")
+
         self.assets_listbox = tk.Listbox(self.user_assets_tab)
-        self.assets_listbox.grid(row=1, column=0, columnspan=3, padx=10, pady=10, sticky="nsew")
+        self.assets_listbox.grid(row=3, column=0, columnspan=3, padx=10, pady=10, sticky="nsew")
+        self.listed_assets = []  # (server, asset) for each listbox line, None for message lines
+        self.listing_user = None  # Username whose assets are listed, None for serial number lookups
+        self.listing_tagged = False
 
         self.user_assets_tab.grid_columnconfigure(0, weight=1)
-        self.user_assets_tab.grid_rowconfigure(1, weight=1)
+        self.user_assets_tab.grid_rowconfigure(3, weight=1)
 
-        tk.Button(self.user_assets_tab, text="Remove Selected Laptop", command=self.remove_selected_laptop).grid(row=2, column=0, columnspan=3, pady=10)
+        tk.Button(self.user_assets_tab, text="Remove Selected Laptop", command=self.remove_selected_laptop).grid(row=4, column=0, columnspan=3, pady=10)
 
     def on_tab_change(self, event):
         selected_tab = event.widget.tab(event.widget.select(), "text")
+        self.cancel_tasks(keep_tab=selected_tab)
+        self.load_tab_data(selected_tab)
+
+    # Tab switches are served from the cache; this is only slow when the cache has expired
+    def load_tab_data(self, selected_tab):
         if selected_tab == 'Assign Laptop':
             self.update_users()
             self.update_laptop_models()
         elif selected_tab == 'Add Laptop':
             self.update_models()
+            self.update_reference_data()
+        elif selected_tab == 'Add Model':
+            self.update_reference_data()
 
-    def update_laptop_models(self):
-        laptop_models = self.fetch_available_laptop_models()
-        if laptop_models:
-            serial_numbers = [model['sn'] for model in laptop_models]
-            self.laptop_model_combo['values'] = serial_numbers
-            self.laptop_model_map = {model['sn']: model['id'] for model in laptop_models}
-        else:
-            self.laptop_model_combo['values'] = []
-            messagebox.showinfo("Info", "No available laptops found.")
-
-    def fetch_available_laptop_models(self):
+    # Discard everything cached for the current server and reload the open tab
+    def refresh_data(self):
+        if not self.server_info:
+            return
+        self.cancel_tasks()
+        self.api.invalidate()
+        if self.api.mirror:
+            self.api.mirror.expire()
+        self.load_tab_data(self.tabControl.tab(self.tabControl.select(), "text"))
+
+    def run_on_ui(self, func, *args):
+        self.ui_queue.put((func, args))
+
+    # Run callbacks handed over by workers. A failing callback is reported in the status bar; it must not
+    # stop the polling, or every later result, outbox update and status change would be lost.
+    def drain_ui_queue(self):
         try:
-            response = requests.get(f'{self.server_info["url"]}/api/back-office-assets/', headers=self.get_headers(), params={'limit': 200})
-            if response.status_code == 200:
-                assets = response.json().get('results', [])
-                available_statuses = {'return in progress', 'new', 'free'}
-                return [asset for asset in assets if asset['status'] in available_statuses]
+            while True:
+                try:
+                    func, args = self.ui_queue.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    func(*args)
+                except tk.TclError:
+                    pass  # The widget was destroyed, e.g. a dialog was closed while its request ran
+                except Exception as e:
+                    self.status_label.config(text=f"Internal error in {getattr(func, '__name__', func)}: {e}")
+        finally:
+            self.after(UI_POLL_MS, self.drain_ui_queue)
+
+    # Run work(task) on the I/O pool; on_done(result) or on_error(exception) then runs on the Tk thread.
+    # Only one task per key runs at a time, so repeated clicks don't queue duplicate requests.
+    # Tasks tied to a tab are loads and are cancelled when the user moves to another tab.
+    def run_in_background(self, key, description, work, on_done=None, on_error=None, tab=None):
+        if key in self.tasks:
+            return None
+        task = BackgroundTask(key, description, on_done, on_error or self.show_load_error, tab)
+        self.tasks[key] = task
+        self.update_status()
+
+        def run():
+            try:
+                task.check()
+                result = work(task)
+            except Exception as e:
+                self.run_on_ui(self.finish_task, task, None, e)
             else:
-                messagebox.showerror("Error", f"Failed to fetch laptop models: {response.text}")
-                return []
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {e}")
-            return []
+                self.run_on_ui(self.finish_task, task, result, None)
 
-    def update_models(self):
-        try:
-            response = requests.get(f'{self.server_info["url"]}/api/assetmodels/', headers=self.get_headers(), params={'limit': 200})
-            if response.status_code == 200:
-                models = response.json().get('results', [])
-                model_names = [model['name'] for model in models]
-                self.model_combo['values'] = model_names
-                self.model_map = {model['name']: model['id'] for model in models}
+        self.io_pool.submit(run)
+        return task
+
+    def finish_task(self, task, result, error):
+        if self.tasks.get(task.key) is task:
+            del self.tasks[task.key]
+        self.update_status()
+        if task.cancelled or isinstance(error, TaskCancelled):
+            return
+        if error is not None:
+            task.on_error(task, error)
+        elif task.on_done:
+            task.on_done(result)
+
+    # Cancel running loads, except those for keep_tab. Writes are never cancelled: the request may already be applied.
+    def cancel_tasks(self, keep_tab=None):
+        for key, task in list(self.tasks.items()):
+            if task.tab and task.tab != keep_tab:
+                task.cancelled = True
+                del self.tasks[key]
+        self.update_status()
+
+    # Let a worker hand pages to a Tk-side handler as they arrive; pages of a cancelled task are dropped
+    def page_handler(self, task, handler):
+        def on_page(page):
+            task.check()
+            self.run_on_ui(self.apply_page, task, handler, page)
+        return on_page
+
+    def apply_page(self, task, handler, page):
+        if not task.cancelled:
+            handler(page)
+
+    def update_status(self):
+        if self.tasks:
+            text = ", ".join(task.description for task in self.tasks.values()) + "..."
+            self.progress.start(10)
+        else:
+            text = "Ready"
+            self.progress.stop()
+        if self.outbox_pending:
+            text += f"  |  {self.outbox_pending} change(s) waiting to be sent"
+        self.status_label.config(text=text)
+
+    # Background loads report failures in the status bar rather than interrupting with a popup
+    def show_load_error(self, task, error):
+        self.status_label.config(text=f"{task.description} failed: {error}")
+
+    # Errors from something the user asked for are shown in a dialog, as before
+    def show_error(self, context):
+        def on_error(task, error):
+            if isinstance(error, RalphAPIError):
+                messagebox.showerror("Error", f"{context}: {error}")
             else:
-                messagebox.showerror("Error", f"Failed to fetch models: {response.text}")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {e}")
+                messagebox.showerror("Error", f"An error occurred: {error}")
+        return on_error
+
+    def update_laptop_models(self):
+        if 'laptops' in self.tasks:
+            return
+        api = self.api
+        self.laptop_model_map = {}
+        self.laptop_model_combo['values'] = []
+
+        self.laptop_index = PrefixIndex()
+
+        def work(task):
+            laptop_models = self.fetch_available_laptop_models(api, on_page=self.page_handler(task, self.add_laptop_models))
+            return PrefixIndex({model['sn']: [model['sn']] for model in laptop_models})
+
+        def done(index):
+            self.laptop_index = index
+            self.filter_laptops()
+            if not index:
+                self.laptop_model_combo['values'] = []
+                messagebox.showinfo("Info", "No available laptops found.")
+
+        self.run_in_background('laptops', "Loading available laptops", work, done, tab='Assign Laptop')
+
+    # Add one page of laptops to the serial number combo as soon as it arrives
+    def add_laptop_models(self, laptop_models):
+        self.laptop_model_map.update({model['sn']: model['id'] for model in laptop_models})
+        self.filter_laptops()
+
+    # Narrow the combo to entries matching what has been typed. Until the index for the current
+    # load is built, fall back to a plain scan of what has arrived so far.
+    def filter_combo(self, combo, index, labels):
+        text = combo.get()
+        if len(index) == len(labels):
+            combo['values'] = index.search(text)
+        else:
+            query = text.strip().lower()
+            combo['values'] = sorted(label for label in labels if query in label.lower())[:MATCH_LIMIT] if query else sorted(labels)
+
+    def filter_users(self):
+        self.filter_combo(self.user_combo, self.user_index, self.user_map)
+
+    def filter_laptops(self):
+        self.filter_combo(self.laptop_model_combo, self.laptop_index, self.laptop_model_map)
+
+    # Only id and sn are used, so ask the server for available laptops and just those fields.
+    # Laptops are picked by serial number, so any without one (Ralph allows a null sn) are left out.
+    # Runs on a worker thread.
+    def fetch_available_laptop_models(self, api, on_page=None):
+        available = []
+        def add_page(assets):
+            page = [asset for asset in assets if asset['status'] in AVAILABLE_STATUSES and asset.get('sn')]
+            available.extend(page)
+            if on_page:
+                on_page(page)
+
+        filters = {'status__in': ','.join(AVAILABLE_STATUSES), 'fields': AVAILABLE_ASSET_FIELDS}
+        api.cached_list('assets', '/api/back-office-assets/', on_page=add_page, optional_params=filters)
+        return available
+
+    def update_models(self):
+        if 'models' in self.tasks:
+            return
+        api = self.api
+        self.model_map = {}
+        self.model_combo['values'] = []
+        def add_page(models):
+            self.model_map.update({model['name']: model['id'] for model in models})
+            self.model_combo['values'] = sorted(self.model_map)
+
+        self.run_in_background(
+            'models', "Loading models",
+            lambda task: api.cached_list('models', '/api/assetmodels/', on_page=self.page_handler(task, add_page)),
+            tab='Add Laptop'
+        )
+
+    # Fill the region, warehouse and manufacturer lists. The combos keep their current entries while
+    # an expired list is fetched again, and a selection the server no longer has is cleared.
+    def update_reference_data(self):
+        if 'reference' in self.tasks:
+            return
+        api = self.api
+
+        def done(reference):
+            if api is not self.api:
+                self.update_reference_data()  # The server was switched while this one was loading
+                return
+            self.reference = reference
+            for combo, kind in ((self.region_combo, 'regions'), (self.warehouse_combo, 'warehouses'),
+                                (self.manufacturer_combo, 'manufacturers'), (self.manufacturer_combo_model, 'manufacturers')):
+                combo['values'] = sorted(reference[kind])
+                if combo.get() and combo.get() not in reference[kind]:
+                    combo.set('')
+
+        self.run_in_background('reference', "Loading regions, warehouses and manufacturers",
+                               lambda task: api.reference_maps(), done)
 
     def update_users(self):
-        try:
-            response = requests.get(f'{self.server_info["url"]}/api/users/', headers=self.get_headers(), params={'limit': 500})
-            if response.status_code == 200:
-                users = response.json().get('results', [])
-                usernames = [user['username'] for user in users]
-                self.user_combo['values'] = usernames
-                self.user_map = {user['username']: user['id'] for user in users}
+        if 'users' in self.tasks:
+            return
+        api = self.api
+        self.user_map = {}
+        self.user_combo['values'] = []
+        self.user_index = PrefixIndex()
+        def add_page(users):
+            self.user_map.update({user['username']: user['id'] for user in users})
+            self.filter_users()
+
+        def work(task):
+            users = api.cached_list('users', '/api/users/', on_page=self.page_handler(task, add_page))
+            return PrefixIndex({
+                user['username']: [user['username'], user.get('first_name'), user.get('last_name'), user.get('email')]
+                for user in users
+            })
+
+        def done(index):
+            self.user_index = index
+            self.filter_users()
+
+        self.run_in_background('users', "Loading users", work, done, tab='Assign Laptop')
+
+    # Make a write. With a mirror it goes through the outbox: journaled and shown locally at once, then
+    # sent in order in the background, with on_done(record) or the failure dialog once the server
+    # answers. Without one it is sent directly, and a success invalidates the cached lists it affects.
+    # expect is the outbox precondition, e.g. {'status': [...]} for an asset that must still be free.
+    def submit_write(self, key, description, method, path, body, expected_status, invalidates, on_done, failure, expect=None, api=None):
+        api = api or self.api
+        if api.outbox:
+            # The callbacks are registered before the sender can settle the entry, however fast it is
+            def queue_write(task):
+                api.outbox.enqueue(description, method, path, body, expected_status, expect,
+                                   on_queued=lambda entry_id: self.write_callbacks.__setitem__((api, entry_id), (on_done, failure)))
+                return api.outbox.pending_count()
+
+            def queued(pending):
+                self.outbox_pending = pending
+                self.update_status()
+
+            self.run_in_background(key, description, queue_write, queued, self.show_error(failure))
+            return
+
+        def work(task):
+            response = api.request(method, path, json=body)
+            if response.status_code != expected_status:
+                raise RalphAPIError(response)
+            api.invalidate(*invalidates)
+            try:
+                return response.json()
+            except ValueError:
+                return None
+        self.run_in_background(key, description, work, on_done, self.show_error(failure))
+
+    # The outbox sender finished with an entry (or scheduled a retry of it)
+    def outbox_settled(self, api, entry, pending):
+        if api is self.clients.get(self.server_info.get('url', '').rstrip('/')):
+            self.outbox_pending = pending  # Only count changes for the server we are looking at
+        if entry['state'] == 'pending':
+            self.update_status()
+            return
+        on_done, failure = self.write_callbacks.pop((api, entry['id']), (None, "Queued change was refused"))
+        self.update_status()
+        if entry['state'] == 'sent':
+            if on_done:
+                on_done(entry['response'])
             else:
-                messagebox.showerror("Error", f"Failed to fetch users: {response.text}")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {e}")
+                self.status_label.config(text=f"Sent: {entry['description']}")
+        elif entry['state'] == 'conflict':
+            messagebox.showerror("Conflict", f"{failure} ({entry['description']}):\n{entry['last_error']}\n\n"
+                                             "The change is kept under View > Pending Changes.")
+
+    # Queued writes that have not gone through: retry or discard them, or send now without waiting
+    def pending_changes_dialog(self):
+        api = self.api
+        if not api.outbox:
+            messagebox.showinfo("Pending Changes", "Changes are sent directly because the local inventory mirror is not available.")
+            return
+
+        dialog = tk.Toplevel(self)
+        dialog.title("Pending Changes")
+        columns = ('id', 'created', 'description', 'state', 'attempts', 'error')
+        tree = ttk.Treeview(dialog, columns=columns, show='headings', height=12)
+        for column, width in zip(columns, (50, 130, 260, 80, 70, 320)):
+            tree.heading(column, text=column.capitalize())
+            tree.column(column, width=width, anchor='w')
+        tree.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
+
+        def reload():
+            tree.delete(*tree.get_children())
+            for entry in api.outbox.entries():
+                created = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['created']))
+                tree.insert('', tk.END, iid=str(entry['id']), values=(
+                    entry['id'], created, entry['description'], entry['state'], entry['attempts'], entry['last_error'] or ''))
+
+        def act(action):
+            selected = [int(iid) for iid in tree.selection()]
+            if not selected:
+                messagebox.showerror("Error", "No change selected", parent=dialog)
+                return
+            def work(task):
+                for entry_id in selected:
+                    action(entry_id)
+                return api.outbox.pending_count()
+            def done(pending):
+                self.outbox_pending = pending
+                self.update_status()
+                reload()
+            self.run_in_background(('outbox', action.__name__), "Updating pending changes", work, done, self.show_error("Failed to update pending changes"))
+
+        buttons = tk.Frame(dialog)
+        buttons.pack(fill=tk.X, padx=10, pady=(0, 10))
+        tk.Button(buttons, text="Retry Selected", command=lambda: act(api.outbox.retry)).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Discard Selected", command=lambda: act(api.outbox.discard)).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Send Now", command=api.outbox.retry_now).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Refresh", command=reload).pack(side=tk.LEFT, padx=5)
+        reload()
 
     def add_user(self):
         username = self.username_entry.get()
@@ -249,14 +1791,12 @@ class RalphGUI(tk.Tk):
             "email": email
         }
 
-        try:
-            response = requests.post(f'{self.server_info["url"]}/api/users/', headers=self.get_headers(), json=user_data)
-            if response.status_code == 201:
-                messagebox.showinfo("Success", "User added successfully")
-            else:
-                messagebox.showerror("Error", f"Failed to add user: {response.text}")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {e}")
+        self.submit_write(
+            'add_user', f"Adding user {username}",
+            'POST', '/api/users/', user_data, 201, ['users'],
+            lambda record: messagebox.showinfo("Success", "User added successfully"),
+            "Failed to add user"
+        )
 
     def assign_laptop(self):
         username = self.user_combo.get()
@@ -266,6 +1806,11 @@ class RalphGUI(tk.Tk):
             messagebox.showerror("Error", "All fields are required")
             return
 
+        # The combos accept typing, so make sure both are entries from the lists
+        if username not in self.user_map or selected_sn not in self.laptop_model_map:
+            messagebox.showerror("Error", "Select a user and a laptop from the lists")
+            return
+
         user_id = self.user_map[username]
         asset_id = self.laptop_model_map[selected_sn]
 
@@ -274,14 +1819,13 @@ class RalphGUI(tk.Tk):
             "status": "in use"
         }
 
-        try:
-            response = requests.patch(f'{self.server_info["url"]}/api/back-office-assets/{asset_id}/', headers=self.get_headers(), json=data)
-            if response.status_code == 200:
-                messagebox.showinfo("Success", "Laptop assigned successfully")
-            else:
-                messagebox.showerror("Error", f"Failed to assign laptop: {response.text}")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {e}")
+        self.submit_write(
+            ('asset', asset_id), f"Assigning {selected_sn} to {username}",
+            'PATCH', f'/api/back-office-assets/{asset_id}/', data, 200, ['assets'],
+            lambda record: messagebox.showinfo("Success", "Laptop assigned successfully"),
+            "Failed to assign laptop",
+            expect={'status': list(AVAILABLE_STATUSES)}
+        )
 
     def remove_laptop(self):
         username = self.user_combo.get()
@@ -291,6 +1835,10 @@ class RalphGUI(tk.Tk):
             messagebox.showerror("Error", "All fields are required")
             return
 
+        if selected_sn not in self.laptop_model_map:
+            messagebox.showerror("Error", "Select a laptop from the list")
+            return
+
         asset_id = self.laptop_model_map[selected_sn]
 
         data = {
@@ -298,14 +1846,12 @@ class RalphGUI(tk.Tk):
             "status": "free"
         }
 
-        try:
-            response = requests.patch(f'{self.server_info["url"]}/api/back-office-assets/{asset_id}/', headers=self.get_headers(), json=data)
-            if response.status_code == 200:
-                messagebox.showinfo("Success", "Laptop removed successfully")
-            else:
-                messagebox.showerror("Error", f"Failed to remove laptop: {response.text}")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {e}")
+        self.submit_write(
+            ('asset', asset_id), f"Removing {selected_sn} from {username}",
+            'PATCH', f'/api/back-office-assets/{asset_id}/', data, 200, ['assets'],
+            lambda record: messagebox.showinfo("Success", "Laptop removed successfully"),
+            "Failed to remove laptop"
+        )
 
     def remove_selected_laptop(self):
         selected_asset = self.assets_listbox.get(tk.ACTIVE)
@@ -313,28 +1859,32 @@ class RalphGUI(tk.Tk):
             messagebox.showerror("Error", "No laptop selected")
             return
 
-        asset_sn = selected_asset.split(' - ')[0]
-
-        if asset_sn not in self.laptop_model_map:
+        index = self.assets_listbox.index(tk.ACTIVE)
+        listed = self.listed_assets[index] if index < len(self.listed_assets) else None
+        if not listed:
             messagebox.showerror("Error", "Selected laptop not found")
             return
 
-        asset_id = self.laptop_model_map[asset_sn]
+        # The laptop may be on another server when the results came from a search of all servers
+        server, asset = listed
+        api = self.client_for(server)
+        asset_id, asset_sn = asset['id'], asset['sn']
 
         data = {
             "user": None,
             "status": "free"
         }
 
-        try:
-            response = requests.patch(f'{self.server_info["url"]}/api/back-office-assets/{asset_id}/', headers=self.get_headers(), json=data)
-            if response.status_code == 200:
-                messagebox.showinfo("Success", "Laptop removed successfully")
-                self.search_user_assets()
-            else:
-                messagebox.showerror("Error", f"Failed to remove laptop: {response.text}")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {e}")
+        # The PATCH response is the updated asset, so the list is updated from it instead of searching again
+        def done(record):
+            self.refresh_listed_asset(server, record if isinstance(record, dict) else dict(asset, **data))
+            messagebox.showinfo("Success", "Laptop removed successfully")
+
+        self.submit_write(
+            ('asset', api.base_url, asset_id), f"Removing {asset_sn}",
+            'PATCH', f'/api/back-office-assets/{asset_id}/', data, 200, ['assets'],
+            done, "Failed to remove laptop", api=api
+        )
 
     def search_user_assets(self):
         username = self.search_user_entry.get()
@@ -343,33 +1893,142 @@ class RalphGUI(tk.Tk):
             messagebox.showerror("Error", "Username is required")
             return
 
-        try:
-            response = requests.get(f'{self.server_info["url"]}/api/users/', headers=self.get_headers(), params={'username': username})
-            if response.status_code == 200:
-                users = response.json().get('results', [])
-                if users:
-                    user_id = users[0]['id']
-                    self.fetch_user_assets(user_id)
-                else:
-                    messagebox.showinfo("Info", "No user found")
-            else:
-                messagebox.showerror("Error", f"Failed to fetch user: {response.text}")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {e}")
+        if self.all_servers_var.get():
+            self.fan_out('search_user_assets', f"Searching all servers for {username}",
+                         lambda api: find_user_assets(api, username, timeout=(5, FANOUT_TIMEOUT)), username)
+            return
 
-    def fetch_user_assets(self, user_id):
-        try:
-            response = requests.get(f'{self.server_info["url"]}/api/back-office-assets/', headers=self.get_headers(), params={'user': user_id})
-            if response.status_code == 200:
-                assets = response.json().get('results', [])
-                self.assets_listbox.delete(0, tk.END)
-                for asset in assets:
-                    self.assets_listbox.insert(tk.END, f"{asset['sn']} - {asset['model']['name']}")
-                self.laptop_model_map = {asset['sn']: asset['id'] for asset in assets}  # Update the laptop_model_map
+        api = self.api
+        def work(task):
+            if api.mirror:
+                # The user is normally known locally; only sync users for one we have not seen yet.
+                # The assets sync is a single incremental request, or none while the cache is fresh.
+                if api.known_user_id(username) is None:
+                    api.cached_list('users', '/api/users/', force=True)
+                    if api.known_user_id(username) is None:
+                        return None
+                task.check()
+                api.cached_list('assets', '/api/back-office-assets/')
+                return api.mirror.user_assets(username)
+            return find_user_assets(api, username)
+
+        def done(assets):
+            if assets is None:
+                messagebox.showinfo("Info", "No user found")
+            else:
+                self.show_user_assets(assets, username)
+
+        self.run_in_background('search_user_assets', "Searching user assets", work, done,
+                               self.show_error("Failed to fetch user assets"), tab='User Assets')
+
+    def show_user_assets(self, assets, username=None):
+        self.assets_listbox.delete(0, tk.END)
+        self.listed_assets = []
+        self.list_server_assets(self.server_info, assets, tagged=False)
+        self.listing_user = username
+        self.laptop_model_map = {asset['sn']: asset['id'] for asset in assets}  # Update the laptop_model_map
+
+    # Show the result of a change to a listed asset without searching again: it leaves a user's asset
+    # list once it no longer belongs to them, otherwise its line is redrawn
+    def refresh_listed_asset(self, server, asset):
+        for index, listed in enumerate(self.listed_assets):
+            if not listed or listed[0] is not server or listed[1]['id'] != asset['id']:
+                continue
+            self.assets_listbox.delete(index)
+            owner = ref_name(asset.get('user'), 'username')
+            if self.listing_user and owner != self.listing_user:
+                del self.listed_assets[index]
+                self.laptop_model_map.pop(asset['sn'], None)
             else:
-                messagebox.showerror("Error", f"Failed to fetch user assets: {response.text}")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {e}")
+                self.assets_listbox.insert(index, self.asset_line(server, asset, self.listing_tagged))
+                self.listed_assets[index] = (server, asset)
+            break
+
+    # Look a serial number up on the current server, or on every server
+    def find_serial(self):
+        sn = self.search_sn_entry.get().strip()
+        if not sn:
+            messagebox.showerror("Error", "Serial number is required")
+            return
+
+        if self.all_servers_var.get():
+            self.fan_out('find_serial', f"Searching all servers for {sn}",
+                         lambda api: find_serial(api, sn, timeout=(5, FANOUT_TIMEOUT)))
+            return
+
+        api = self.api
+        def done(assets):
+            if not assets:
+                messagebox.showinfo("Info", f"No laptop with serial number {sn}")
+                return
+            self.assets_listbox.delete(0, tk.END)
+            self.listed_assets = []
+            self.listing_user = None
+            self.list_server_assets(self.server_info, assets, tagged=False)
+
+        self.run_in_background('find_serial', f"Looking up {sn}", lambda task: find_serial(api, sn), done,
+                               self.show_error("Failed to look up serial number"), tab='User Assets')
+
+    # Run query(api) against every configured server at once. Each server's results are listed, tagged
+    # with its nickname, as soon as it answers; servers that fail or take longer than FANOUT_TIMEOUT
+    # get a line saying so instead.
+    def fan_out(self, key, description, query, listing_user=None):
+        if not self.servers:
+            messagebox.showerror("Error", "No servers configured")
+            return
+        targets = [(server, self.client_for(server)) for server in self.servers]
+        self.assets_listbox.delete(0, tk.END)
+        self.listed_assets = []
+        self.listing_user = listing_user
+
+        def work(task):
+            pool = ThreadPoolExecutor(max_workers=len(targets))
+            futures = {pool.submit(query, api): server for server, api in targets}
+            found = 0
+            try:
+                for future in as_completed(futures, timeout=FANOUT_TIMEOUT):
+                    server = futures[future]
+                    try:
+                        assets = future.result()
+                    except Exception as e:
+                        message = f"failed: {e}"
+                        self.run_on_ui(self.apply_page, task, lambda _, server=server, message=message: self.list_server_message(server, message), None)
+                        continue
+                    assets = assets or []
+                    found += len(assets)
+                    self.run_on_ui(self.apply_page, task, lambda page, server=server: self.list_server_assets(server, page), assets)
+            except FuturesTimeoutError:
+                for future, server in futures.items():
+                    if not future.done():
+                        self.run_on_ui(self.apply_page, task, lambda _, server=server: self.list_server_message(server, "no answer in time"), None)
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+            return found
+
+        def done(found):
+            if not found:
+                self.list_server_message(None, "Nothing found on any server")
+
+        self.run_in_background(key, description, work, done, self.show_error("Search failed"), tab='User Assets')
+
+    def list_server_assets(self, server, assets, tagged=True):
+        self.listing_tagged = tagged
+        for asset in assets:
+            self.assets_listbox.insert(tk.END, self.asset_line(server, asset, tagged))
+            self.listed_assets.append((server, asset))
+
+    @staticmethod
+    def asset_line(server, asset, tagged):
+        line = f"{asset['sn']} - {ref_name(asset.get('model')) or ''}"
+        if tagged:
+            user = ref_name(asset.get('user'), 'username')
+            line = f"[{server['nickname']}] {line} ({asset.get('status')}{', ' + user if user else ''})"
+        return line
+
+    def list_server_message(self, server, message):
+        self.assets_listbox.insert(tk.END, f"[{server['nickname']}] {message}" if server else message)
+        self.assets_listbox.itemconfig(tk.END, foreground="grey")
+        self.listed_assets.append(None)
 
     def add_laptop(self):
         model_name = self.model_combo.get()
@@ -386,9 +2045,12 @@ class RalphGUI(tk.Tk):
             return
 
         model_id = self.model_map[model_name]
-        region_id = REGIONS[region_name]
-        warehouse_id = WAREHOUSES[warehouse_name]
-        manufacturer_id = MANUFACTURERS[manufacturer_name]
+        region_id = self.reference['regions'].get(region_name)
+        warehouse_id = self.reference['warehouses'].get(warehouse_name)
+        manufacturer_id = self.reference['manufacturers'].get(manufacturer_name)
+        if None in (region_id, warehouse_id, manufacturer_id):
+            messagebox.showerror("Error", "Regions, warehouses and manufacturers are still loading for this server; please choose again")
+            return
 
         data = {
             "model": model_id,
@@ -404,14 +2066,12 @@ class RalphGUI(tk.Tk):
             "category": "laptop" 
         }
 
-        try:
-            response = requests.post(f'{self.server_info["url"]}/api/back-office-assets/', headers=self.get_headers(), json=data)
-            if response.status_code == 201:
-                messagebox.showinfo("Success", "Laptop added successfully")
-            else:
-                messagebox.showerror("Error", f"Failed to add laptop: {response.text}")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {e}")
+        self.submit_write(
+            'add_laptop', f"Adding laptop {sn}",
+            'POST', '/api/back-office-assets/', data, 201, ['assets'],
+            lambda record: messagebox.showinfo("Success", "Laptop added successfully"),
+            "Failed to add laptop"
+        )
 
     def add_model(self):
         model_name = self.model_name_entry.get()
@@ -421,7 +2081,10 @@ class RalphGUI(tk.Tk):
             messagebox.showerror("Error", "All fields are required")
             return
 
-        manufacturer_id = MANUFACTURERS[manufacturer_name]
+        manufacturer_id = self.reference['manufacturers'].get(manufacturer_name)
+        if manufacturer_id is None:
+            messagebox.showerror("Error", "Manufacturers are still loading for this server; please choose again")
+            return
 
         data = {
             "name": model_name,
@@ -432,15 +2095,178 @@ class RalphGUI(tk.Tk):
             "type": "back_office"
         }
 
-        try:
-            response = requests.post(f'{self.server_info["url"]}/api/assetmodels/', headers=self.get_headers(), json=data)
-            if response.status_code == 201:
-                messagebox.showinfo("Success", "Model added successfully")
-                self.update_models()
-            else:
-                messagebox.showerror("Error", f"Failed to add model: {response.text}")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {e}")
+        def done(record):
+            messagebox.showinfo("Success", "Model added successfully")
+            self.update_models()
+
+        self.submit_write(
+            'add_model', f"Adding model {model_name}",
+            'POST', '/api/assetmodels/', data, 201, ['models'],
+            done, "Failed to add model"
+        )
+
+    # CSV columns: sn, barcode, model, region, warehouse, price, and optionally manufacturer, price_currency
+    def bulk_add_laptops(self):
+        self.run_bulk(
+            'bulk_add_laptops', "Adding laptops",
+            lambda api, fieldnames, rows: validate_laptop_rows(
+                fieldnames, rows, api.cached_list('models', '/api/assetmodels/'), api.reference_maps()),
+            lambda api, item: api.post('/api/back-office-assets/', json=item['data']), 201,
+            "added"
+        )
+
+    # CSV columns: sn, username
+    def bulk_assign_laptops(self):
+        self.run_bulk(
+            'bulk_assign_laptops', "Assigning laptops",
+            lambda api, fieldnames, rows: validate_assignment_rows(
+                fieldnames, rows, api.cached_list('users', '/api/users/'), self.fetch_available_laptop_models(api)),
+            lambda api, item: api.patch(f"/api/back-office-assets/{item['id']}/", json=item['data']), 200,
+            "assigned"
+        )
+
+    # Read a CSV, validate every row locally, send the valid ones with bounded concurrency, then write
+    # a per-row report and a retry file next to the CSV. Progress is shown in the status bar.
+    def run_bulk(self, key, description, validate, send, expected_status, verb):
+        csv_path = filedialog.askopenfilename(title="Select CSV", filetypes=[("CSV files", "*.csv")])
+        if not csv_path:
+            return
+        api = self.api
+
+        def work(task):
+            fieldnames, rows = read_csv_rows(csv_path)
+            items = validate(api, fieldnames, rows)
+
+            def on_progress(done, total):
+                task.description = f"{description} ({done}/{total})"
+                self.run_on_ui(self.update_status)
+
+            try:
+                send_bulk(api, items, send, expected_status, on_progress)
+            finally:
+                api.invalidate('assets')
+            return items, write_bulk_report(csv_path, fieldnames, items)
+
+        def done(result):
+            items, (report_path, retry_path) = result
+            counts = {outcome: sum(1 for item in items if item['result'] == outcome) for outcome in ('ok', 'failed', 'invalid')}
+            summary = f"{counts['ok']} {verb}, {counts['failed']} failed, {counts['invalid']} invalid.\n\nReport: {report_path}"
+            if retry_path:
+                summary += f"\nRetry file: {retry_path}"
+            messagebox.showinfo("Bulk Result", summary)
+
+        self.run_in_background(key, description, work, done, self.show_error("Bulk run failed"))
+
+    # Stream the full back-office asset list from the server to CSV or JSON lines, with progress and ETA
+    def export_assets(self):
+        path = filedialog.asksaveasfilename(
+            title="Export Assets", defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("JSON lines", "*.jsonl")]
+        )
+        if not path:
+            return
+        api = self.api
+
+        def work(task):
+            def on_progress(rows, total, rate):
+                if total:
+                    eta = (total - rows) / rate if rate else 0
+                    task.description = f"Exporting assets ({rows}/{total}, {rate:.0f} rows/s, ETA {eta:.0f}s)"
+                else:
+                    task.description = f"Exporting assets ({rows}, {rate:.0f} rows/s)"
+                self.run_on_ui(self.update_status)
+            return export_assets(api, path, on_progress, task.check)
+
+        self.run_in_background(
+            'export_assets', "Exporting assets", work,
+            lambda rows: messagebox.showinfo("Export Complete", f"Exported {rows} assets to {path}"),
+            self.show_error("Export failed")
+        )
+
+    # Sync the asset mirror and summarise assignable laptops per warehouse from it
+    def available_laptops_report(self):
+        api = self.api
+        if not api.mirror:
+            messagebox.showerror("Error", f"Reports need the local inventory mirror, which could not be opened in {MIRROR_DIR}")
+            return
+
+        def work(task):
+            api.cached_list('assets', '/api/back-office-assets/')
+            return api.mirror.available_per_warehouse()
+
+        def done(rows):
+            window = tk.Toplevel(self)
+            window.title("Available Laptops per Warehouse")
+            columns = ('warehouse', 'free', 'new', 'in_return', 'available')
+            tree = ttk.Treeview(window, columns=columns, show='headings', height=15)
+            for column, heading, width in zip(columns, ("Warehouse", "Free", "New", "Return in progress", "Total"), (200, 70, 70, 130, 70)):
+                tree.heading(column, text=heading)
+                tree.column(column, width=width, anchor='w' if column == 'warehouse' else 'e')
+            for row in rows:
+                tree.insert('', tk.END, values=tuple(row))
+            tree.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
+
+        self.run_in_background('report_available', "Building report", work, done, self.show_error("Failed to build report"))
+
+    # Live request statistics for the current server and the slow/failed request log, refreshed every
+    # second, with a dump of every server's metrics to a JSON file for support tickets
+    def diagnostics_dialog(self):
+        if not self.server_info:
+            messagebox.showerror("Error", "No server selected")
+            return
+        api = self.api
+        dialog = tk.Toplevel(self)
+        dialog.title(f"Diagnostics - {self.server_info.get('nickname', api.base_url)}")
+        dialog.geometry("1000x550")
+
+        columns = ('endpoint', 'count', 'errors', 'p50', 'p95', 'p99', 'kb', 'json')
+        headings = ("Endpoint", "Requests", "Errors", "p50 ms", "p95 ms", "p99 ms", "KB received", "JSON ms (avg)")
+        endpoints = ttk.Treeview(dialog, columns=columns, show='headings', height=10)
+        for column, heading, width in zip(columns, headings, (330, 70, 90, 70, 70, 70, 90, 110)):
+            endpoints.heading(column, text=heading)
+            endpoints.column(column, width=width, anchor='w' if column == 'endpoint' else 'e')
+        endpoints.pack(expand=True, fill=tk.BOTH, padx=10, pady=(10, 5))
+
+        tk.Label(dialog, text=f"Slow (over {SLOW_REQUEST_SECONDS:g}s) and failed requests:").pack(anchor='w', padx=10)
+        slow = tk.Listbox(dialog, height=10)
+        slow.pack(expand=True, fill=tk.BOTH, padx=10, pady=5)
+
+        def refresh():
+            if not dialog.winfo_exists():
+                return
+            endpoints.delete(*endpoints.get_children())
+            for row in api.metrics.summary():
+                endpoints.insert('', tk.END, values=(
+                    row['endpoint'], row['count'], f"{row['errors']} ({row['error_rate']:.0%})",
+                    row['p50_ms'], row['p95_ms'], row['p99_ms'], f"{row['bytes'] / 1024:.1f}",
+                    f"{row['json_ms']} ({row['json_ms_avg']})"))
+            slow.delete(0, tk.END)
+            for entry in reversed(api.metrics.slow_requests()):
+                slow.insert(tk.END, f"{entry['time']}  {entry['seconds']:>7.3f}s  {entry['status'] or '---'}  "
+                                    f"{entry['request']}{'  ' + entry['error'] if entry['error'] else ''}")
+            dialog.after(1000, refresh)
+
+        def save():
+            path = filedialog.asksaveasfilename(parent=dialog, title="Save Diagnostics", defaultextension=".json",
+                                                filetypes=[("JSON files", "*.json")])
+            if not path:
+                return
+            report = {
+                'generated': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'servers': {
+                    client.base_url: {'endpoints': client.metrics.summary(), 'slow_requests': client.metrics.slow_requests()}
+                    for client in self.clients.values()
+                },
+            }
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=4)
+            messagebox.showinfo("Diagnostics", f"Saved to {path}", parent=dialog)
+
+        buttons = tk.Frame(dialog)
+        buttons.pack(fill=tk.X, padx=10, pady=(0, 10))
+        tk.Button(buttons, text="Save to File...", command=save).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons, text="Reset", command=api.metrics.reset).pack(side=tk.LEFT, padx=5)
+        refresh()
 
     def load_servers(self):
         if os.path.exists(CONFIG_FILE):
@@ -459,11 +2285,37 @@ class RalphGUI(tk.Tk):
         else:
             self.server_selection_dialog()
 
-    def get_headers(self):
-        return {
-            'Authorization': f'Token {self.server_info["api_token"]}',
-            'Content-Type': 'application/json'
-        }
+    @property
+    def api(self):
+        return self.client_for(self.server_info)
+
+    # The client for any configured server. A new client starts replaying that server's outbox, once
+    # a client it replaces (the token was edited) has stopped sending from the same queue.
+    def client_for(self, server):
+        key = server['url'].rstrip('/')
+        if key in self.clients and self.clients[key].api_token != server['api_token']:
+            self.retire_client(key)
+        if key not in self.clients:
+            replaced = self.retiring.pop(key, None)
+            api = self.clients[key] = RalphClient(server)
+            if api.outbox:
+                def start_outbox():
+                    if replaced:
+                        replaced.result()
+                    api.outbox.start(lambda entry: self.run_on_ui(self.outbox_settled, api, entry, api.outbox.pending_count()))
+                if replaced:
+                    self.io_pool.submit(start_outbox)
+                else:
+                    start_outbox()
+        return self.clients[key]
+
+    # Close the client for a server that was edited or removed, off the Tk thread since its sender
+    # may be in the middle of a request
+    def retire_client(self, url):
+        key = url.rstrip('/')
+        api = self.clients.pop(key, None)
+        if api:
+            self.retiring[key] = self.io_pool.submit(api.close)
 
     def server_selection_dialog(self):
         dialog = tk.Toplevel(self)
@@ -557,6 +2409,9 @@ class RalphGUI(tk.Tk):
                 messagebox.showerror("Error", "All fields are required")
                 return
 
+            changed = (url, api_token) != (selected_server['url'], selected_server['api_token'])
+            if changed:
+                self.retire_client(selected_server['url'])
             selected_server.update({
                 "nickname": nickname,
                 "url": url,
@@ -567,6 +2422,11 @@ class RalphGUI(tk.Tk):
             self.server_listbox.delete(selected_index)
             self.server_listbox.insert(selected_index, nickname)
             dialog.destroy()
+            if changed and selected_server is self.server_info:
+                # Reconnect with the new details and reload the open tab
+                self.cancel_tasks()
+                self.connect()
+                self.load_tab_data(self.tabControl.tab(self.tabControl.select(), "text"))
 
         tk.Button(dialog, text="Save", command=save_server).grid(row=3, column=0, columnspan=2, pady=10)
 
@@ -576,7 +2436,9 @@ class RalphGUI(tk.Tk):
             messagebox.showerror("Error", "No server selected")
             return
         selected_index = selected_index[0]
-        self.servers.pop(selected_index)
+        server = self.servers.pop(selected_index)
+        if not any(other['url'].rstrip('/') == server['url'].rstrip('/') for other in self.servers):
+            self.retire_client(server['url'])
         self.save_servers()
         self.server_listbox.delete(selected_index)
 
@@ -593,6 +2455,11 @@ class RalphGUI(tk.Tk):
         self.save_servers()
         self.server_info = self.servers[selected_index]
         parent.destroy()
+        if hasattr(self, 'tabControl'):
+            # Drop loads from the previous server and reload the open tab from the new one
+            self.cancel_tasks()
+            self.connect()
+            self.load_tab_data(self.tabControl.tab(self.tabControl.select(), "text"))
 
 if __name__ == "__main__":
     app = RalphGUI()
@@ -1,15 +1,53 @@
 import tkinter as tk
-from tkinter import filedialog
+from tkinter import filedialog, ttk, messagebox
 from pathlib import Path
 from openai import OpenAI, OpenAIError
+import httpx
 import logging
 import os
+import re
+import time
+import hashlib
+import unicodedata
+import queue
+import shutil
+import subprocess
+import threading
+import csv
+from concurrent.futures import ThreadPoolExecutor
 import winreg as reg
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+TTS_MODEL = "tts-1"
+TTS_VOICE = "alloy"
+TTS_FORMAT = "mp3"
+VOICES = ("alloy", "echo", "fable", "onyx", "nova", "shimmer")
+
+# The speech endpoint accepts at most 4096 characters per request, so longer text is split
+# at paragraph, then sentence boundaries and the chunks are synthesised in parallel
+MAX_CHUNK_CHARS = 4000
+SYNTHESIS_WORKERS = 4
+
+# Audio is written to disk (and to the player, if enabled) in blocks of this size as it arrives
+STREAM_BLOCK_SIZE = 16 * 1024
+
+# Synthesised chunks are cached on disk by a hash of their normalised text, voice, model and
+# format; the least recently used entries are evicted once the folder passes CACHE_MAX_BYTES
+CACHE_DIR = os.path.join(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")), "OpenAITranscriber", "tts_cache")
+CACHE_MAX_BYTES = 500 * 1024 * 1024
+cache_lock = threading.Lock()
+
+# Background worker: JOB_WORKERS files are written at once, while every chunk request from every
+# job shares one pool of SYNTHESIS_WORKERS threads and one keep-alive connection pool
+JOB_WORKERS = 2
+job_pool = ThreadPoolExecutor(max_workers=JOB_WORKERS)
+synthesis_pool = ThreadPoolExecutor(max_workers=SYNTHESIS_WORKERS)
+client = None
+client_lock = threading.Lock()
+
 # Function to get the API key from the Windows registry
 def get_api_key():
     try:
@@ -21,6 +59,213 @@ def get_api_key():
         logger.error("Registry key not found.")
         return None
 
+# Function to split text into chunks under max_chars: one per paragraph, long paragraphs split at sentence breaks
+def split_text(text, max_chars=MAX_CHUNK_CHARS):
+    # Pieces are (separator, text): paragraphs rejoin with a blank line, sentences with a space
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(("\n\n", paragraph))
+            continue
+        separator = "\n\n"
+        for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+            while len(sentence) > max_chars:
+                # A single run-on sentence; break at the last space that fits
+                cut = sentence.rfind(" ", 0, max_chars)
+                if cut <= 0:
+                    cut = max_chars
+                pieces.append((separator, sentence[:cut]))
+                sentence = sentence[cut:].lstrip()
+                separator = " "
+            if sentence:
+                pieces.append((separator, sentence))
+                separator = " "
+
+    # Pack sentences of the same paragraph back together so we make as few requests as possible.
+    # Paragraphs always start a new chunk, so editing one only invalidates its own cache entries.
+    chunks = []
+    for separator, piece in pieces:
+        if chunks and separator == " " and len(chunks[-1]) + len(separator) + len(piece) <= max_chars:
+            chunks[-1] += separator + piece
+        else:
+            chunks.append(piece)
+    return chunks
+
+# Function to build the cache key for a chunk; whitespace and Unicode form differences don't change the speech
+def cache_key(text, voice=TTS_VOICE, model=TTS_MODEL, response_format=TTS_FORMAT):
+    normalised = " ".join(unicodedata.normalize("NFC", text).split())
+    return hashlib.sha256("\0".join((normalised, voice, model, response_format)).encode("utf-8")).hexdigest()
+
+def cache_path(key):
+    return os.path.join(CACHE_DIR, key + "." + TTS_FORMAT)
+
+# Function to trim the cache to max_bytes, oldest first. A file that can't be read or removed (e.g. another
+# job is streaming it on Windows) is logged and skipped; eviction never fails the caller.
+def evict_cache(max_bytes=CACHE_MAX_BYTES):
+    with cache_lock:
+        entries = []
+        try:
+            names = os.listdir(CACHE_DIR)
+        except OSError as e:
+            logger.error(f"Could not list the speech cache: {e}")
+            return
+        for name in names:
+            if name.endswith("." + TTS_FORMAT):
+                try:
+                    stat = os.stat(os.path.join(CACHE_DIR, name))
+                except OSError:
+                    continue  # Removed meanwhile
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(os.path.join(CACHE_DIR, name))
+            except OSError as e:
+                logger.error(f"Could not evict {name} from the speech cache: {e}")
+                continue
+            total -= size
+
+# Function to stream one chunk of synthesised audio into a queue; None marks the end,
+# and an exception object is passed through so the writer can re-raise it in order.
+# Returns True when the chunk was served from the cache.
+def stream_chunk(client, text, blocks, voice=TTS_VOICE):
+    cached_file = cache_path(cache_key(text, voice))
+    partial_file = None
+    try:
+        try:
+            with open(cached_file, "rb") as f:
+                for block in iter(lambda: f.read(STREAM_BLOCK_SIZE), b""):
+                    blocks.put(block)
+            os.utime(cached_file)  # Mark as recently used
+            blocks.put(None)
+            return True
+        except FileNotFoundError:
+            pass
+
+        # Stream into a temporary file alongside the queue; it only becomes a cache entry once complete
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        partial_file = f"{cached_file}.{threading.get_ident()}.part"
+        with open(partial_file, "wb") as partial:
+            with client.audio.speech.with_streaming_response.create(
+                model=TTS_MODEL,
+                voice=voice,
+                input=text,
+                response_format=TTS_FORMAT
+            ) as response:
+                for block in response.iter_bytes(STREAM_BLOCK_SIZE):
+                    partial.write(block)
+                    blocks.put(block)
+        os.replace(partial_file, cached_file)
+        blocks.put(None)
+    except Exception as e:
+        if partial_file and os.path.exists(partial_file):
+            os.remove(partial_file)
+        blocks.put(e)
+        return False
+    # Only once the chunk is delivered, so a cache problem can't fail audio that was already saved
+    evict_cache()
+    return False
+
+# Function to start ffplay reading MP3 from stdin, for playback while the file is still being written
+def start_player():
+    player = shutil.which("ffplay")
+    if not player:
+        logger.error("ffplay not found on PATH; progressive playback disabled.")
+        return None
+    return subprocess.Popen(
+        [player, "-nodisp", "-autoexit", "-loglevel", "quiet", "-i", "-"],
+        stdin=subprocess.PIPE,
+        creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+    )
+
+# Function to synthesise all chunks concurrently and write the audio to one file in order as it arrives.
+# MP3 streams can be joined frame-for-frame, so plain concatenation gives a playable file.
+# Returns (time to first byte, total time, chunks served from cache), times in seconds.
+def synthesize_to_file(client, text, speech_file_path, on_progress=None, play=False, voice=TTS_VOICE, max_chars=MAX_CHUNK_CHARS):
+    started = time.perf_counter()
+    first_byte = None
+    chunks = split_text(text, max_chars)
+    queues = [queue.Queue() for _ in chunks]
+    player = start_player() if play else None
+    futures = [synthesis_pool.submit(stream_chunk, client, chunk, blocks, voice) for chunk, blocks in zip(chunks, queues)]
+    try:
+        with open(speech_file_path, "wb") as f:
+            # Drain chunk queues in order: the current chunk streams straight through,
+            # later ones buffer in memory until it is their turn
+            for index, blocks in enumerate(queues, start=1):
+                while True:
+                    block = blocks.get()
+                    if block is None:
+                        break
+                    if isinstance(block, Exception):
+                        raise block
+                    f.write(block)
+                    f.flush()
+                    if player:
+                        try:
+                            player.stdin.write(block)
+                        except OSError:
+                            player = None  # Player window closed; keep writing the file
+                    if first_byte is None:
+                        first_byte = time.perf_counter() - started
+                        if on_progress:
+                            on_progress(0, len(chunks), first_byte)
+                if on_progress:
+                    on_progress(index, len(chunks), first_byte)
+    finally:
+        # On failure, drop this job's chunks that haven't started yet
+        for future in futures:
+            future.cancel()
+        if player:
+            try:
+                player.stdin.close()
+            except OSError:
+                pass
+    cached = sum(1 for future in futures if future.result())
+    return first_byte, time.perf_counter() - started, cached
+
+# Function to return the shared OpenAI client, reading the API key and opening the connection pool once
+def get_client():
+    global client
+    with client_lock:
+        if client is None:
+            api_key = get_api_key()
+            if not api_key:
+                return None
+            limits = httpx.Limits(max_connections=SYNTHESIS_WORKERS, max_keepalive_connections=SYNTHESIS_WORKERS)
+            client = OpenAI(api_key=api_key, http_client=httpx.Client(limits=limits, timeout=httpx.Timeout(600.0, connect=10.0)))
+        return client
+
+# Widgets may only be touched from the Tk thread, so the synthesis thread queues its updates here
+def run_on_ui(func, *args):
+    ui_queue.put((func, args))
+
+# A failing callback is logged and shown; it must not stop the polling that delivers every later update
+def drain_ui_queue():
+    try:
+        while True:
+            try:
+                func, args = ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                func(*args)
+            except tk.TclError:
+                pass  # The widget was destroyed, e.g. the batch window was closed mid-run
+            except Exception as e:
+                logger.exception("UI update %s failed", getattr(func, '__name__', func))
+                status_label.config(text=f"Internal error: {e}")
+    finally:
+        root.after(100, drain_ui_queue)
+
+def set_status(text):
+    status_label.config(text=text)
+
 # Function to generate speech and save to file
 def generate_speech():
     input_text = text_input.get("1.0", tk.END).strip()
@@ -40,55 +285,169 @@ def generate_speech():
     
     speech_file_path = Path(output_path)
 
+    # Synthesise on the background worker so the window stays responsive while audio streams in
+    status_label.config(text="Generating speech...")
+    generate_button.config(state=tk.DISABLED)
+    job_pool.submit(run_synthesis, input_text, speech_file_path, play_var.get(), voice_combo.get())
+
+def run_synthesis(input_text, speech_file_path, play, voice):
     try:
         # Ensure the directory exists
         os.makedirs(speech_file_path.parent, exist_ok=True)
-        
-        # Retrieve the API key
-        api_key = get_api_key()
-        if not api_key:
-            status_label.config(text="API key not found. Please check the registry.")
+
+        client = get_client()
+        if client is None:
+            run_on_ui(set_status, "API key not found. Please check the registry.")
             return
 
-        # Initialize OpenAI client with the API key
-        client = OpenAI(api_key=api_key)
-        
-        # Create speech using OpenAI API
-        response = client.audio.speech.create(
-            model="tts-1",
-            voice="alloy",
-            input=input_text
-        )
+        def on_progress(done, total, first_byte):
+            run_on_ui(set_status, f"First audio after {first_byte or 0:.2f}s; synthesised {done} of {total} chunks...")
 
-        # Stream response to file
-        response.stream_to_file(speech_file_path)
-        
-        logger.info(f"Speech file successfully saved to {speech_file_path}")
-        status_label.config(text=f"Success! File saved to {speech_file_path}")
+        first_byte, total, cached = synthesize_to_file(client, input_text, speech_file_path, on_progress, play, voice)
+
+        logger.info(f"Speech file successfully saved to {speech_file_path} (TTFB {first_byte or 0:.2f}s, total {total:.2f}s, {cached} chunk(s) cached)")
+        run_on_ui(set_status, f"Success! File saved to {speech_file_path}\nFirst audio after {first_byte or 0:.2f}s, total {total:.2f}s, {cached} chunk(s) from cache")
     except OpenAIError as e:
         logger.error(f"An error occurred with the OpenAI API: {e}")
-        status_label.config(text="An error occurred with the OpenAI API. Check logs for details.")
+        run_on_ui(set_status, "An error occurred with the OpenAI API. Check logs for details.")
     except Exception as e:
         logger.error(f"An error occurred: {e}")
-        status_label.config(text="An error occurred. Check logs for details.")
+        run_on_ui(set_status, "An error occurred. Check logs for details.")
+    finally:
+        run_on_ui(generate_button.config, {"state": tk.NORMAL})
+
+# Function to read batch items from a folder of .txt files (id = file name) or a CSV with id, text[, voice] columns
+def load_batch_items(source, default_voice):
+    items = []
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.lower().endswith(".txt"):
+                with open(os.path.join(source, name), "r", encoding="utf-8") as f:
+                    items.append({"id": os.path.splitext(name)[0], "text": f.read().strip(), "voice": default_voice})
+    else:
+        with open(source, "r", encoding="utf-8-sig", newline="") as f:
+            for row in csv.DictReader(f):
+                items.append({
+                    "id": (row.get("id") or "").strip(),
+                    "text": (row.get("text") or "").strip(),
+                    "voice": (row.get("voice") or "").strip() or default_voice,
+                })
+    return items
+
+def run_batch_item(item, output_dir, tree):
+    def show(status):
+        run_on_ui(tree.set, item["id"], "status", status)
+
+    if not item["text"]:
+        show("Skipped (no text)")
+        return
+    if item["voice"] not in VOICES:
+        show(f"Error: unknown voice '{item['voice']}'")
+        return
+    try:
+        client = get_client()
+        if client is None:
+            show("Error: API key not found")
+            return
+        show("Synthesising...")
+        first_byte, total, cached = synthesize_to_file(
+            client, item["text"], Path(output_dir) / f"{item['id']}.{TTS_FORMAT}", voice=item["voice"]
+        )
+        show(f"Done (TTFB {first_byte or 0:.2f}s, total {total:.2f}s, {cached} cached)")
+    except Exception as e:
+        logger.error(f"Batch item {item['id']} failed: {e}")
+        show(f"Error: {e}")
+
+# Batch window: pick a folder of .txt files or a CSV, an output folder, and watch per-item status
+def open_batch_window():
+    window = tk.Toplevel(root)
+    window.title("Batch Text to Speech")
+    state = {"items": [], "output_dir": None}
+
+    tree = ttk.Treeview(window, columns=("voice", "status"), height=15)
+    tree.heading("#0", text="ID")
+    tree.heading("voice", text="Voice")
+    tree.heading("status", text="Status")
+    tree.column("voice", width=80)
+    tree.column("status", width=320)
+
+    def load(source):
+        if not source:
+            return
+        try:
+            items = load_batch_items(source, voice_combo.get())
+        except (OSError, csv.Error, UnicodeDecodeError) as e:
+            messagebox.showerror("Error", f"Could not read {source}: {e}", parent=window)
+            return
+        ids = [item["id"] for item in items]
+        if any(not item_id for item_id in ids) or len(set(ids)) != len(ids):
+            messagebox.showerror("Error", "Every item needs a unique, non-empty id.", parent=window)
+            return
+        state["items"] = items
+        tree.delete(*tree.get_children())
+        for item in items:
+            tree.insert("", tk.END, iid=item["id"], text=item["id"], values=(item["voice"], "Pending"))
+
+    def select_output_dir():
+        output_dir = filedialog.askdirectory(parent=window)
+        if output_dir:
+            state["output_dir"] = output_dir
+            output_label.config(text=output_dir)
+
+    def start():
+        if not state["items"] or not state["output_dir"]:
+            messagebox.showerror("Error", "Select the input and an output folder first.", parent=window)
+            return
+        for item in state["items"]:
+            tree.set(item["id"], "status", "Queued")
+            job_pool.submit(run_batch_item, item, state["output_dir"], tree)
+
+    buttons = tk.Frame(window)
+    buttons.pack(pady=5)
+    tk.Button(buttons, text="Select Folder of .txt Files", command=lambda: load(filedialog.askdirectory(parent=window))).pack(side=tk.LEFT, padx=5)
+    tk.Button(buttons, text="Select CSV (id, text, voice)", command=lambda: load(filedialog.askopenfilename(parent=window, filetypes=[("CSV files", "*.csv")]))).pack(side=tk.LEFT, padx=5)
+    tk.Button(buttons, text="Select Output Folder", command=select_output_dir).pack(side=tk.LEFT, padx=5)
+    output_label = tk.Label(window, text="No output folder selected")
+    output_label.pack()
+    tree.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
+    tk.Button(window, text="Start Batch", command=start).pack(pady=10)
+
+# Queue for updates from the synthesis threads
+ui_queue = queue.Queue()
+
+if __name__ == "__main__":
+    # Set up the GUI
+    root = tk.Tk()
+    root.title("Text to Speech Generator")
+
+    # Input text field
+    tk.Label(root, text="Enter text:").pack(pady=5)
+    text_input = tk.Text(root, height=10, width=50)
+    text_input.pack(pady=5)
+
+    # Voice selection
+    tk.Label(root, text="Voice:").pack()
+    voice_combo = ttk.Combobox(root, values=VOICES, state="readonly")
+    voice_combo.set(TTS_VOICE)
+    voice_combo.pack(pady=5)
 
-# Set up the GUI
-root = tk.Tk()
-root.title("Text to Speech Generator")
+    # Generate button
+    generate_button = tk.Button(root, text="Generate Speech", command=generate_speech)
+    generate_button.pack(pady=10)
 
-# Input text field
-tk.Label(root, text="Enter text:").pack(pady=5)
-text_input = tk.Text(root, height=10, width=50)
-text_input.pack(pady=5)
+    # Progressive playback option
+    play_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(root, text="Play while generating (requires ffplay)", variable=play_var).pack()
 
-# Generate button
-generate_button = tk.Button(root, text="Generate Speech", command=generate_speech)
-generate_button.pack(pady=10)
+    # Batch mode
+    tk.Button(root, text="Batch Mode...", command=open_batch_window).pack(pady=5)
 
-# Status label
-status_label = tk.Label(root, text="")
-status_label.pack(pady=5)
+    # Status label
+    status_label = tk.Label(root, text="")
+    status_label.pack(pady=5)
 
-# Start the GUI event loop
-root.mainloop()
+    # Poll for updates from the synthesis threads
+    root.after(100, drain_ui_queue)
 
+    # Start the GUI event loop
+    root.mainloop()
@@ -0,0 +1,186 @@
+import argparse
+import importlib.machinery
+import importlib.util
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from openai import OpenAI
+
+# Latency/throughput benchmark for "openai TTS.py" and "avi-mp3 to whisper". It imports the tools'
+# own synthesis and upload code and drives it against "openai stub server.py" (started in-process
+# unless --base-url points somewhere else), across a grid of chunk sizes and concurrency levels.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# The tools are scripts with spaces in their names (one without a .py extension), so load them by path
+def load_script(name, filename):
+    loader = importlib.machinery.SourceFileLoader(name, os.path.join(HERE, filename))
+    spec = importlib.util.spec_from_loader(name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+# Mirrors how each tool builds its client: the TTS tool keeps the SDK's own retries,
+# the transcriber turns them off and leaves retrying to its RequestScheduler
+def make_client(base_url, connections, max_retries):
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    return OpenAI(api_key="stub", base_url=base_url, max_retries=max_retries,
+                  http_client=httpx.Client(limits=limits, timeout=600.0))
+
+
+# Requests the in-process stub has answered for one endpoint, or None when benchmarking another server
+def served(server, name):
+    if not server:
+        return None
+    with server.counts_lock:
+        return server.counts.get(name, 0)
+
+
+# Synthesise the same text at each chunk size / concurrency, with an empty cache every time
+def bench_tts(tts, base_url, text_chars, chunk_sizes, concurrencies, repeat, server=None):
+    text = make_text(text_chars)
+    rows = []
+    for max_chars in chunk_sizes:
+        for concurrency in concurrencies:
+            client = make_client(base_url, concurrency, max_retries=2)
+            tts.synthesis_pool = ThreadPoolExecutor(max_workers=concurrency)
+            first_bytes, totals = [], []
+            before = served(server, "speech")
+            for _ in range(repeat):
+                with tempfile.TemporaryDirectory() as work_dir:
+                    tts.CACHE_DIR = os.path.join(work_dir, "cache")
+                    first_byte, total, _ = tts.synthesize_to_file(
+                        client, text, os.path.join(work_dir, "out.mp3"), max_chars=max_chars
+                    )
+                first_bytes.append(first_byte or 0.0)
+                totals.append(total)
+            tts.synthesis_pool.shutdown()
+            rows.append({
+                "tool": "tts",
+                "chunk": f"{max_chars} chars",
+                "concurrency": concurrency,
+                # Counted by the stub when it is ours; chunks served from the cache are not requests
+                "requests": (served(server, "speech") - before if server else len(tts.split_text(text, max_chars)) * repeat),
+                "ttfb_p50": statistics.median(first_bytes),
+                "latency_p50": statistics.median(totals),
+                "latency_p95": percentile(totals, 95),
+                "throughput": f"{len(text) * repeat / sum(totals):.0f} chars/s",
+            })
+    return rows
+
+
+# Paragraphs of about 4,500 characters made of numbered sentences. Every sentence is different, so
+# however the text is split no two chunks are identical (and served from the cache) within a run.
+def make_text(chars):
+    paragraphs = []
+    total = 0
+    sentences = 0
+    while total < chars:
+        paragraph = " ".join(f"Sentence {sentences + i + 1}: the quick brown fox jumps over the lazy dog." for i in range(70))
+        sentences += 70
+        paragraphs.append(paragraph)
+        total += len(paragraph) + 2
+    return "\n\n".join(paragraphs)[:chars].strip()
+
+
+# Upload `files` dummy audio files of each size through the transcriber's scheduler at each concurrency
+def bench_whisper(whisper, base_url, files, upload_sizes, concurrencies, requests_per_minute):
+    rows = []
+    for size_mb in upload_sizes:
+        with tempfile.TemporaryDirectory() as work_dir:
+            audio_file = os.path.join(work_dir, "audio.mp3")
+            with open(audio_file, "wb") as f:
+                f.write(os.urandom(int(size_mb * 1024 * 1024)))
+
+            for concurrency in concurrencies:
+                whisper.client = make_client(base_url, concurrency, max_retries=0)
+                whisper.scheduler = whisper.RequestScheduler(requests_per_minute=requests_per_minute)
+                jobs = [{"file_path": audio_file, "audio_file": audio_file, "offset_map": None, "timings": {}}
+                        for _ in range(files)]
+
+                def run(job):
+                    started = time.perf_counter()
+                    whisper.upload_audio(job)
+                    return time.perf_counter() - started
+
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    latencies = list(pool.map(run, jobs))
+                wall = time.perf_counter() - started
+                rows.append({
+                    "tool": "whisper",
+                    "chunk": f"{size_mb:g} MB",
+                    "concurrency": concurrency,
+                    "requests": files,
+                    # Time from the successful attempt starting to the response arriving, excluding rate-limit waits
+                    "ttfb_p50": statistics.median(job["timings"]["upload"] + job["timings"]["server"] for job in jobs),
+                    "latency_p50": statistics.median(latencies),
+                    "latency_p95": percentile(latencies, 95),
+                    "throughput": f"{size_mb * files / wall:.1f} MB/s",
+                })
+    return rows
+
+
+def print_rows(rows):
+    header = f"{'tool':<8} {'chunk':>12} {'conc':>5} {'reqs':>5} {'ttfb p50':>9} {'lat p50':>8} {'lat p95':>8}  throughput"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['tool']:<8} {row['chunk']:>12} {row['concurrency']:>5} {row['requests']:>5} "
+              f"{row['ttfb_p50']:>8.2f}s {row['latency_p50']:>7.2f}s {row['latency_p95']:>7.2f}s  {row['throughput']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the OpenAI-backed tools against a local stub server.")
+    parser.add_argument("--base-url", help="use an already running server instead of starting the stub")
+    parser.add_argument("--tool", choices=("tts", "whisper", "both"), default="both")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--chunk-chars", type=int, nargs="+", default=[500, 2000, 4000], help="TTS chunk sizes")
+    parser.add_argument("--text-chars", type=int, default=20000, help="length of the TTS benchmark text")
+    parser.add_argument("--upload-mb", type=float, nargs="+", default=[1, 5], help="transcription upload sizes")
+    parser.add_argument("--files", type=int, default=8, help="transcription uploads per configuration")
+    parser.add_argument("--repeat", type=int, default=3, help="TTS runs per configuration")
+    parser.add_argument("--requests-per-minute", type=int, default=600, help="transcription scheduler request budget")
+    parser.add_argument("--latency", type=float, default=0.3, help="stub: seconds before the first response byte")
+    parser.add_argument("--bandwidth", type=int, default=4 * 1024 * 1024, help="stub: bytes/s each way per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub: fraction of requests answered with 429")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        stub = load_script("openai_stub_server", "openai stub server.py")
+        server = stub.start_stub_server(stub.StubSettings(latency=args.latency, bandwidth=args.bandwidth,
+                                                          error_rate=args.error_rate, retry_after=0.5))
+        base_url = server.base_url
+
+    rows = []
+    if args.tool in ("tts", "both"):
+        tts = load_script("openai_tts", "openai TTS.py")
+        rows += bench_tts(tts, base_url, args.text_chars, args.chunk_chars, args.concurrency, args.repeat, server)
+    if args.tool in ("whisper", "both"):
+        whisper = load_script("avi_mp3_to_whisper", "avi-mp3 to whisper")
+        rows += bench_whisper(whisper, base_url, args.files, args.upload_mb, args.concurrency, args.requests_per_minute)
+    print_rows(rows)
+
+    if server:
+        print(f"\nStub requests served: {server.counts}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import json
+import logging
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the OpenAI speech and transcription endpoints, for exercising
+# "openai TTS.py" and "avi-mp3 to whisper" without the live API. Point the tools at it with
+#   set OPENAI_BASE_URL=http://127.0.0.1:8089/v1
+
+# Initialize logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8089
+
+# Simulated MP3 size per input character (tts-1 produces roughly this at normal speaking speed)
+BYTES_PER_CHAR = 1000
+
+# Simulated server-side transcription cost, reported back in openai-processing-ms
+PROCESSING_SECONDS_PER_MB = 0.5
+
+
+class StubSettings:
+    def __init__(self, latency=0.2, bandwidth=0, chunk_size=16 * 1024, error_rate=0.0,
+                 server_error_rate=0.0, retry_after=1.0, bytes_per_char=BYTES_PER_CHAR,
+                 processing_per_mb=PROCESSING_SECONDS_PER_MB):
+        self.latency = latency                      # Seconds before the first response byte
+        self.bandwidth = bandwidth                  # Bytes per second each way per request, 0 = unlimited
+        self.chunk_size = chunk_size                # Size of each chunk in streamed speech responses
+        self.error_rate = error_rate                # Probability of answering 429
+        self.server_error_rate = server_error_rate  # Probability of answering 503
+        self.retry_after = retry_after              # Retry-After sent with injected 429s, in seconds
+        self.bytes_per_char = bytes_per_char
+        self.processing_per_mb = processing_per_mb
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive and we can use chunked encoding
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    @property
+    def settings(self):
+        return self.server.settings
+
+    def do_POST(self):
+        body = self.read_body()
+        if self.inject_error():
+            return
+        if self.path.rstrip("/").endswith("/audio/speech"):
+            self.handle_speech(body)
+        elif self.path.rstrip("/").endswith("/audio/transcriptions"):
+            self.handle_transcription(body)
+        else:
+            self.send_json(404, {"error": {"message": f"Unknown endpoint {self.path}", "type": "invalid_request_error"}})
+
+    # Read the request body, throttled to the configured bandwidth to simulate upload time
+    def read_body(self):
+        remaining = int(self.headers.get("Content-Length", 0))
+        parts = []
+        while remaining > 0:
+            part = self.rfile.read(min(remaining, self.settings.chunk_size))
+            if not part:
+                break
+            parts.append(part)
+            remaining -= len(part)
+            self.throttle(len(part))
+        return b"".join(parts)
+
+    def throttle(self, size):
+        if self.settings.bandwidth:
+            time.sleep(size / self.settings.bandwidth)
+
+    def inject_error(self):
+        roll = random.random()
+        if roll < self.settings.error_rate:
+            self.send_json(429, {"error": {"message": "Rate limit reached (stub)", "type": "requests"}},
+                           {"Retry-After": f"{self.settings.retry_after:g}"})
+            self.server.count("429")
+            return True
+        if roll < self.settings.error_rate + self.settings.server_error_rate:
+            self.send_json(503, {"error": {"message": "Service unavailable (stub)", "type": "server_error"}})
+            self.server.count("503")
+            return True
+        return False
+
+    def handle_speech(self, body):
+        try:
+            request = json.loads(body)
+        except ValueError:
+            self.send_json(400, {"error": {"message": "Body is not JSON", "type": "invalid_request_error"}})
+            return
+        text = request.get("input", "")
+        if not text or len(text) > 4096:
+            self.send_json(400, {"error": {"message": "input must be 1-4096 characters", "type": "invalid_request_error"}})
+            return
+
+        time.sleep(self.settings.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        # Deterministic filler audio so cached and fresh responses can be compared byte for byte
+        remaining = len(text) * self.settings.bytes_per_char
+        filler = (text.encode("utf-8") * (self.settings.chunk_size // max(1, len(text)) + 1))[:self.settings.chunk_size]
+        while remaining > 0:
+            chunk = filler[:min(remaining, len(filler))]
+            self.wfile.write(f"{len(chunk):X}\r\n".encode("ascii") + chunk + b"\r\n")
+            self.wfile.flush()
+            remaining -= len(chunk)
+            self.throttle(len(chunk))
+        self.wfile.write(b"0\r\n\r\n")
+        self.server.count("speech")
+
+    def handle_transcription(self, body):
+        match = re.search(rb'name="response_format"\r\n\r\n([a-z_]+)', body)
+        response_format = match.group(1).decode("ascii") if match else "json"
+
+        processing = len(body) / (1024 * 1024) * self.settings.processing_per_mb
+        time.sleep(self.settings.latency + processing)
+
+        words = max(1, len(body) // 4000)
+        text = " ".join(f"word{i}" for i in range(words))
+        result = {"text": text}
+        if response_format == "verbose_json":
+            result.update(task="transcribe", language="english", duration=float(words), segments=[
+                {"id": i, "start": float(i * 10), "end": float(i * 10 + 10), "text": " ".join(f"word{j}" for j in range(i * 20, min(words, i * 20 + 20)))}
+                for i in range((words + 19) // 20)
+            ])
+        self.send_json(200, result, {"openai-processing-ms": str(int(processing * 1000))})
+        self.server.count("transcriptions")
+
+    def send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, settings):
+        super().__init__(address, StubHandler)
+        self.settings = settings
+        self.counts = {}
+        self.counts_lock = threading.Lock()
+
+    # Clients hanging up mid-response (e.g. a benchmark finishing) are expected, not errors
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+    def count(self, name):
+        with self.counts_lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+# Start a stub server on a background thread; port 0 picks a free port
+def start_stub_server(settings=None, host="127.0.0.1", port=0):
+    server = StubServer((host, port), settings or StubSettings())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI speech and transcription endpoints.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before the first response byte")
+    parser.add_argument("--bandwidth", type=int, default=0, help="bytes per second each way per request (0 = unlimited)")
+    parser.add_argument("--chunk-size", type=int, default=16 * 1024, help="bytes per chunk in streamed speech responses")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--server-error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    args = parser.parse_args()
+
+    settings = StubSettings(latency=args.latency, bandwidth=args.bandwidth, chunk_size=args.chunk_size,
+                            error_rate=args.error_rate, server_error_rate=args.server_error_rate,
+                            retry_after=args.retry_after)
+    server = StubServer((args.host, args.port), settings)
+    logger.info(f"Stub OpenAI server listening; set OPENAI_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info(f"Requests served: {server.counts}")
+
+
+if __name__ == "__main__":
+    main()